@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+# Deterministic stand-ins for silpo.ua responses, shaped after captured ones:
+#   GetCategoryProducts  product-api.silpo.ua/api/v1/Product/GetCategoryProducts
+#   EcomCatalogGlobal    api.catalog.ecom.silpo.ua/api/2.0/exec/EcomCatalogGlobal
+#   SSR HTML             category page with the Next.js __NEXT_DATA__ payload
+#   challenge            Cloudflare "Just a moment..." interstitial
+# The same (seed, page) always yields the same products, so results of two
+# benchmark runs are comparable. `python -m benchmarks.fixtures` writes one
+# sample of each into benchmarks/fixtures/ for inspection.
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+CATEGORY_SLUG = "molochni-produkty-ta-iaitsia-234"
+PER_PAGE = 24
+TOTAL_PAGES = 10
+
+_KINDS = [
+    ("Молоко", ["2.5%", "3.2%", "1%", "2.6%"], ["900 мл", "1 л", "870 г", "1,5 л"]),
+    ("Кефір", ["1%", "2.5%", "3.2%"], ["900 г", "450 г", "1 л"]),
+    ("Йогурт", ["1.5%", "2.5%", "5%"], ["270 г", "400 г", "125 г"]),
+    ("Сметана", ["15%", "20%", "25%"], ["300 г", "350 г", "400г"]),
+    ("Сир кисломолочний", ["5%", "9%", "0.2%"], ["300 г", "500 г", "0,5 кг"]),
+    ("Масло вершкове", ["72.5%", "82%", "73%"], ["180 г", "200 г"]),
+    ("Вершки", ["10%", "15%", "33%"], ["200 мл", "500 мл"]),
+    ("Ряжанка", ["2.5%", "4%"], ["450 г", "900 мл"]),
+    ("Яйця курячі", ["С1", "С0"], ["10 шт", "15 шт", "6 шт"]),
+    ("Десерт сирковий", ["5%", "9%"], ["90 г", "150 г"]),
+]
+_BRANDS = ["Галичина", "Яготинське", "Простоквашино", "Ферма", "Лавка традицій",
+           "President", "Danone", "Активіа", "Слов'яночка", "Премія"]
+
+def products(page: int, per_page: int = PER_PAGE, seed: int = 1) -> List[Dict[str, Any]]:
+    """Neutral product dicts of one page (id, title, brand, prices, slug)."""
+    rnd = random.Random(seed * 100003 + page)
+    out = []
+    for i in range(per_page):
+        kind, fats, packs = _KINDS[rnd.randrange(len(_KINDS))]
+        brand = _BRANDS[rnd.randrange(len(_BRANDS))]
+        title = f"{kind} «{brand}» {rnd.choice(fats)} {rnd.choice(packs)}"
+        price = round(rnd.uniform(19.0, 189.0), 2)
+        old = round(price * rnd.uniform(1.05, 1.4), 2) if rnd.random() < 0.3 else None
+        pid = 100000 + (page - 1) * per_page + i
+        out.append({"id": pid, "title": title, "brand": brand, "price": price, "old": old,
+                    "slug": f"{kind.split()[0].lower()}-{pid}"})
+    return out
+
+def get_category_products_page(page: int, per_page: int = PER_PAGE, seed: int = 1) -> Dict[str, Any]:
+    items = []
+    for p in products(page, per_page, seed):
+        items.append({
+            "id": p["id"],
+            "name": p["title"],
+            "slug": p["slug"],
+            "brandTitle": p["brand"],
+            "price": p["price"],
+            "oldPrice": p["old"],
+            "displayRatio": "шт",
+            "icon": f"https://images.silpo.ua/products/{p['id']}.png",
+            "stock": 12.0,
+            "sectionSlug": CATEGORY_SLUG,
+        })
+    return {"total": per_page * TOTAL_PAGES, "items": items}
+
+def ecom_catalog_page(page: int, per_page: int = PER_PAGE, seed: int = 1) -> Dict[str, Any]:
+    items = []
+    for p in products(page, per_page, seed):
+        prices: Dict[str, Any] = {"current": p["price"]}
+        if p["old"] is not None:
+            prices["old"] = p["old"]
+        items.append({
+            "id": str(p["id"]),
+            "title": p["title"],
+            "brand": {"id": _BRANDS.index(p["brand"]) + 1, "title": p["brand"]},
+            "url": f"/product/{p['slug']}",
+            "prices": prices,
+            "attributes": [{"key": "country", "value": "Україна"}],
+        })
+    return {"meta": {"total": per_page * TOTAL_PAGES, "page": page}, "data": {"items": items}}
+
+def ssr_html(page: int, per_page: int = PER_PAGE, seed: int = 1) -> str:
+    next_data = {
+        "props": {"pageProps": {
+            "category": {"slug": CATEGORY_SLUG, "page": page},
+            "products": ecom_catalog_page(page, per_page, seed)["data"]["items"],
+        }},
+        "page": "/category/[slug]",
+        "buildId": "bench",
+    }
+    cards = "\n".join(
+        f'<div class="product-card"><a href="/product/{p["slug"]}">{p["title"]}</a>'
+        f'<span class="price">{p["price"]:.2f} грн</span></div>'
+        for p in products(page, per_page, seed)
+    )
+    return (
+        "<!DOCTYPE html><html lang=\"uk\"><head><meta charset=\"utf-8\"><title>Сільпо</title></head>"
+        f"<body><div id=\"__next\">{cards}</div>"
+        f"<script id=\"__NEXT_DATA__\" type=\"application/json\">{json.dumps(next_data, ensure_ascii=False)}</script>"
+        "</body></html>"
+    )
+
+def challenge_html() -> str:
+    return (
+        "<!DOCTYPE html><html lang=\"en-US\"><head><title>Just a moment...</title></head>"
+        "<body><div id=\"challenge-error-text\">Enable JavaScript and cookies to continue</div>"
+        "<form id=\"challenge-form\" class=\"cf-challenge\" method=\"POST\"></form></body></html>"
+    )
+
+def write_samples(out_dir: str = FIXTURES_DIR, seed: int = 1) -> List[str]:
+    os.makedirs(out_dir, exist_ok=True)
+    files = {
+        "get_category_products_page1.json": json.dumps(get_category_products_page(1, seed=seed), ensure_ascii=False, indent=1),
+        "ecom_catalog_page1.json": json.dumps(ecom_catalog_page(1, seed=seed), ensure_ascii=False, indent=1),
+        "category_page1.html": ssr_html(1, seed=seed),
+        "challenge.html": challenge_html(),
+    }
+    paths = []
+    for name, text in files.items():
+        path = os.path.join(out_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Write sample benchmark fixtures")
+    ap.add_argument("--out", default=FIXTURES_DIR)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    for p in write_samples(args.out, args.seed):
+        print(p)
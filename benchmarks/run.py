@@ -0,0 +1,319 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+
+# Ensure imports from src/
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from silpo.metrics import percentile
+
+from . import fixtures
+from .server import StandInServer
+
+# Offline benchmark suite: `python -m benchmarks.run [--only db_ exporter] [--compare old.json]`.
+# Every benchmark runs against deterministic fixtures (benchmarks/fixtures.py),
+# HTTP ones against a local StandInServer, and the results are written as JSON
+# (one entry per benchmark: min/median/p95 ms per call, items/s) so two runs
+# can be compared. A benchmark whose dependency is missing is recorded as skipped.
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+class Context:
+    def __init__(self, args: argparse.Namespace, server: StandInServer, tmp: str):
+        self.args = args
+        self.server = server
+        self.tmp = tmp
+        pages = range(1, args.pages + 1)
+        self.gcp_pages = [fixtures.get_category_products_page(p, args.per_page, args.seed) for p in pages]
+        self.ecom_pages = [fixtures.ecom_catalog_page(p, args.per_page, args.seed) for p in pages]
+        self.html_pages = [fixtures.ssr_html(p, args.per_page, args.seed) for p in pages]
+        self.challenge = fixtures.challenge_html()
+        self.titles = [p["title"] for n in pages for p in fixtures.products(n, args.per_page, args.seed)]
+
+    def raws(self) -> List[Dict[str, Any]]:
+        return [it for pg in self.gcp_pages for it in pg["items"]] + \
+               [it for pg in self.ecom_pages for it in pg["data"]["items"]]
+
+def _measure(fn: Callable[[], Any], repeat: int, items: Optional[int] = None,
+             setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """Time fn() `repeat` times after one warm-up; setup() (untimed) runs before each call."""
+    if setup:
+        setup()
+    fn()
+    ms: List[float] = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        ms.append((time.perf_counter() - t0) * 1000.0)
+    median = percentile(ms, 50)
+    out: Dict[str, Any] = {
+        "repeat": repeat,
+        "min_ms": round(min(ms), 3),
+        "median_ms": round(median, 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+    }
+    if items is not None:
+        out["items"] = items
+        out["items_per_s"] = round(items / (median / 1000.0), 1) if median else None
+    return out
+
+# --- HTTP -----------------------------------------------------------------
+
+def _api_fetch(ctx: Context, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    from silpo.api_client import fetch_products_page
+    from silpo.api_discovery import ApiTemplate
+    tpl = ApiTemplate(endpoint=ctx.server.url + path, method="POST",
+                      headers={"content-type": "application/json", "accept": "application/json"},
+                      cookies={}, body=body)
+    got = {"products": 0, "non_200": 0}
+
+    def run():
+        got["products"] = got["non_200"] = 0
+        for page in range(1, ctx.args.pages + 1):
+            status, products, _ = fetch_products_page(tpl, page, timeout=30)
+            got["products"] += len(products)
+            got["non_200"] += status != 200
+    res = _measure(run, ctx.args.repeat, items=ctx.args.pages)
+    res.update(products_last=got["products"], non_200_last=got["non_200"],
+               latency_ms=ctx.server.latency_ms, error_rate=ctx.server.error_rate)
+    return res
+
+def bench_api_client_get_category_products(ctx: Context) -> Dict[str, Any]:
+    return _api_fetch(ctx, "/api/v1/Product/GetCategoryProducts", {"page": 1, "limit": ctx.args.per_page})
+
+def bench_api_client_ecom_catalog(ctx: Context) -> Dict[str, Any]:
+    return _api_fetch(ctx, "/api/2.0/exec/EcomCatalogGlobal",
+                      {"query": {"collection": "EcomCatalogGlobal"}, "page": {"size": ctx.args.per_page, "number": 1}})
+
+# --- parsing --------------------------------------------------------------
+
+def bench_json_walk_scraper(ctx: Context) -> Dict[str, Any]:
+    from silpo.scraper import _extract_products_from_any_json
+    docs = ctx.gcp_pages + ctx.ecom_pages
+    return _measure(lambda: [_extract_products_from_any_json(d) for d in docs], ctx.args.repeat, items=len(docs))
+
+def bench_json_walk_api_client(ctx: Context) -> Dict[str, Any]:
+    from silpo.api_client import _find_products_list
+    docs = ctx.gcp_pages + ctx.ecom_pages
+    return _measure(lambda: [_find_products_list(d) for d in docs], ctx.args.repeat, items=len(docs))
+
+def bench_html_next_data(ctx: Context) -> Dict[str, Any]:
+    from silpo.html_scraper import extract_next_data, find_productish_nodes, is_challenge_html
+    pages = ctx.html_pages + [ctx.challenge]
+
+    def run():
+        for html in pages:
+            if not is_challenge_html(html):
+                find_productish_nodes(extract_next_data(html))
+    return _measure(run, ctx.args.repeat, items=len(pages))
+
+def bench_json_stream_large_page(ctx: Context) -> Dict[str, Any]:
+    """Full json.loads + walk vs jsonstream on one --large-page page: time and tracemalloc peak."""
+    import tracemalloc
+    from silpo.api_client import _find_products_list, iter_products
+    from silpo.jsonstream import iter_chunks
+    body = json.dumps(fixtures.get_category_products_page(1, ctx.args.large_page, ctx.args.seed),
+                      ensure_ascii=False).encode("utf-8")
+
+    def peak_kb(fn: Callable[[], Any]) -> float:
+        tracemalloc.start()
+        try:
+            fn()
+            return round(tracemalloc.get_traced_memory()[1] / 1024.0, 1)
+        finally:
+            tracemalloc.stop()
+    full = lambda: sum(1 for _ in _find_products_list(json.loads(body)))
+    stream = lambda: sum(1 for _ in iter_products(iter_chunks(body)))
+    res = _measure(stream, ctx.args.repeat, items=ctx.args.large_page)
+    res.update(payload_kb=round(len(body) / 1024.0, 1), peak_kb_stream=peak_kb(stream), peak_kb_full=peak_kb(full),
+               full_median_ms=_measure(full, ctx.args.repeat)["median_ms"])
+    return res
+
+def bench_normalize_scraper(ctx: Context) -> Dict[str, Any]:
+    from silpo.scraper import _norm_product
+    raws = ctx.raws()
+    return _measure(lambda: [_norm_product(r) for r in raws], ctx.args.repeat, items=len(raws))
+
+def bench_normalize_html(ctx: Context) -> Dict[str, Any]:
+    from silpo.html_scraper import normalize
+    raws = ctx.raws()
+    return _measure(lambda: [normalize(r) for r in raws], ctx.args.repeat, items=len(raws))
+
+def bench_extractors(ctx: Context) -> Dict[str, Any]:
+    from silpo import extractors as ex
+    titles = ctx.titles
+
+    def run():
+        for t in titles:
+            pack = ex.extract_pack(t)
+            ex.compute_price_per_unit(42.0, pack)
+            ex.extract_brand(t)
+            ex.extract_product_type(t)
+            ex.extract_fat_pct(t)
+            ex.normalize_title(t)
+    return _measure(run, ctx.args.repeat, items=len(titles))
+
+# --- storage / export -----------------------------------------------------
+
+def _batch(ctx: Context, run_id: str, upload_ts: str):
+    """ProductBatch of --rows rows, cycling the fixture products with unique ids."""
+    from silpo.model import ProductBatch
+    from silpo.scraper import _norm_product
+    base = [_norm_product(r) for pg in ctx.gcp_pages for r in pg["items"]]
+    batch = ProductBatch(run_id, upload_ts, 1, fixtures.CATEGORY_SLUG)
+    for i in range(ctx.args.rows):
+        title, brand, pid, purl, qty, unit, pc, po, disc = base[i % len(base)]
+        batch.append(source="api", product_id=f"{pid}-{i // len(base)}", product_url=purl, title=title,
+                     brand=brand, pack_qty=qty, pack_unit=unit, price_current=pc, price_old=po,
+                     discount_pct=disc, raw_json=None)
+    return batch
+
+def _fresh_db(ctx: Context, name: str, run_id: str):
+    from silpo import db
+    path = os.path.join(ctx.tmp, name)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    conn = db.connect(path)
+    db.init(conn)
+    db.insert_run(conn, run_id, "2026-01-01T00:00:00+00:00", fixtures.CATEGORY_SLUG, ctx.args.pages, True)
+    return conn
+
+def bench_db_insert(ctx: Context) -> Dict[str, Any]:
+    from silpo import db
+    batch = _batch(ctx, "bench-run", "2026-01-01T00:00:00+00:00")
+    state: Dict[str, Any] = {}
+
+    def setup():
+        if state.get("conn"):
+            state["conn"].close()
+        state["conn"] = _fresh_db(ctx, "insert.sqlite", "bench-run")
+    res = _measure(lambda: db.insert_products(state["conn"], batch), ctx.args.repeat, items=len(batch), setup=setup)
+    state["conn"].close()
+    return res
+
+def bench_db_refresh(ctx: Context) -> Dict[str, Any]:
+    from silpo import db
+    conn = _fresh_db(ctx, "refresh.sqlite", "bench-run")
+    db.insert_products(conn, _batch(ctx, "bench-run", "2026-01-01T00:00:00+00:00"))
+
+    def run():
+        db.refresh_latest_prices(conn, "bench-run")
+        db.refresh_unit_prices(conn, "bench-run")
+        conn.commit()
+    res = _measure(run, ctx.args.repeat, items=ctx.args.rows)
+    conn.close()
+    return res
+
+def bench_exporter(ctx: Context) -> Dict[str, Any]:
+    from silpo import db
+    from silpo.exporter import export_history, export_xlsx_csv
+    conn = _fresh_db(ctx, "export.sqlite", "bench-run")
+    db.insert_products(conn, _batch(ctx, "bench-run", "2026-01-01T00:00:00+00:00"))
+    out_dir = os.path.join(ctx.tmp, "exports")
+
+    def setup():
+        shutil.rmtree(out_dir, ignore_errors=True)
+        conn.execute("DELETE FROM export_state")
+        conn.commit()
+
+    def run():
+        export_xlsx_csv(conn, out_dir, "bench-run")
+        export_history(conn, out_dir)
+    res = _measure(run, ctx.args.repeat, items=ctx.args.rows, setup=setup)
+    conn.close()
+    return res
+
+BENCHMARKS: Dict[str, Callable[[Context], Dict[str, Any]]] = {
+    name[len("bench_"):]: fn for name, fn in sorted(globals().items()) if name.startswith("bench_")
+}
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """median_ms ratio (new / baseline) per benchmark present in both; < 1.0 is faster."""
+    out = {}
+    for name, r in results.items():
+        b = baseline.get("results", {}).get(name) or {}
+        if r.get("median_ms") and b.get("median_ms"):
+            out[name] = round(r["median_ms"] / b["median_ms"], 3)
+    return out
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    names = [n for n in BENCHMARKS if not args.only or any(n.startswith(o) for o in args.only)]
+    results: Dict[str, Any] = {}
+    tmp = tempfile.mkdtemp(prefix="silpo-bench-")
+    try:
+        with StandInServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                           per_page=args.per_page, seed=args.seed) as server:
+            ctx = Context(args, server, tmp)
+            for name in names:
+                try:
+                    results[name] = BENCHMARKS[name](ctx)
+                except ImportError as e:
+                    results[name] = {"skipped": f"{type(e).__name__}: {e}"}
+                print(f"{name:40s} {json.dumps(results[name], ensure_ascii=False)}", file=sys.stderr)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        "meta": {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: getattr(args, k) for k in ("pages", "per_page", "rows", "large_page", "repeat", "seed",
+                                                      "latency_ms", "jitter_ms", "error_rate")},
+        },
+        "results": results,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Offline Silpo benchmarks (local stand-in server + fixtures)")
+    ap.add_argument("--only", nargs="*", default=None, help=f"name prefixes of: {', '.join(BENCHMARKS)}")
+    ap.add_argument("--pages", type=int, default=fixtures.TOTAL_PAGES)
+    ap.add_argument("--per-page", type=int, default=fixtures.PER_PAGE)
+    ap.add_argument("--rows", type=int, default=20000, help="rows for the db_* and exporter benchmarks")
+    ap.add_argument("--large-page", type=int, default=5000, help="products in the json_stream_large_page page")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--out", default=None, help="default: benchmarks/results/bench_<ts>.json")
+    ap.add_argument("--compare", default=None, help="baseline results JSON")
+    args = ap.parse_args(argv)
+
+    report = run_suite(args)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["compare"] = {"baseline": args.compare, "median_ratio": compare(report["results"], json.load(f))}
+
+    out = args.out or os.path.join(RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(out)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
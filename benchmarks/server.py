@@ -0,0 +1,161 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from . import fixtures
+
+# Local stand-in for silpo.ua. Routes:
+#   POST /api/v1/Product/GetCategoryProducts    body {"page": N, ...} or {"pagination": {"page": N}}
+#   POST /api/2.0/exec/EcomCatalogGlobal        body {"page": {"number": N, "size": S}, ...}
+#   GET  /category/<slug>?page=N                SSR HTML with __NEXT_DATA__
+#   GET  /challenge                             Cloudflare interstitial (403)
+# Every response is delayed by latency_ms (+- jitter_ms); with probability
+# error_rate it is a 503 instead. Point the scraper at it with
+# SILPO_CATEGORY_URL=http://127.0.0.1:<port>/category/<slug>.
+
+def _page_from_body(body: Dict[str, Any]) -> int:
+    if isinstance(body.get("page"), dict):
+        return int(body["page"].get("number") or 1)
+    for k in ("page", "Page", "pageNumber", "PageNumber"):
+        if isinstance(body.get(k), int):
+            return body[k]
+    pag = body.get("pagination")
+    if isinstance(pag, dict):
+        return int(pag.get("page") or pag.get("pageNumber") or 1)
+    return 1
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        per_page: int = fixtures.PER_PAGE,
+        seed: int = 1,
+    ):
+        super().__init__((host, port), _Handler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.per_page = per_page
+        self.seed = seed
+        self.requests = 0
+        self.errors = 0
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _draw(self) -> tuple:
+        """(delay_s, fail) for one request; seeded, so error sequences repeat."""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self._rnd.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            fail = self._rnd.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="silpo-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StandInServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: str, ctype: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _gate(self) -> bool:
+        delay, fail = self.server._draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self._send(503, "<html><body>503 Service Unavailable</body></html>", "text/html; charset=utf-8")
+        return not fail
+
+    def do_POST(self) -> None:
+        n = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(n) or b"{}")
+        except ValueError:
+            self._send(400, '{"error": "bad json"}', "application/json")
+            return
+        path = urlparse(self.path).path
+        if path.endswith("/Product/GetCategoryProducts"):
+            make = fixtures.get_category_products_page
+        elif path.endswith("/exec/EcomCatalogGlobal"):
+            make = fixtures.ecom_catalog_page
+        else:
+            self._send(404, '{"error": "not found"}', "application/json")
+            return
+        if self._gate():
+            page = _page_from_body(body)
+            data = make(page, self.server.per_page, self.server.seed) if page <= fixtures.TOTAL_PAGES else {"items": []}
+            self._send(200, json.dumps(data, ensure_ascii=False), "application/json; charset=utf-8")
+
+    def do_GET(self) -> None:
+        u = urlparse(self.path)
+        if u.path == "/challenge":
+            if self._gate():
+                self._send(403, fixtures.challenge_html(), "text/html; charset=utf-8")
+        elif u.path.startswith("/category/"):
+            if self._gate():
+                page = int((parse_qs(u.query).get("page") or ["1"])[0])
+                self._send(200, fixtures.ssr_html(page, self.server.per_page, self.server.seed), "text/html; charset=utf-8")
+        else:
+            self._send(404, "not found", "text/plain")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serve benchmark fixtures as a local silpo.ua stand-in")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--per-page", type=int, default=fixtures.PER_PAGE)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    srv = StandInServer(port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, per_page=args.per_page, seed=args.seed)
+    print(f"serving on {srv.url}/category/{fixtures.CATEGORY_SLUG}", flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
@@ -1,9 +1,11 @@
 import json
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 import requests
 
 from .api_discovery import ApiTemplate
+from .config import settings
+from .jsonstream import CHUNK_SIZE, iter_array_elements
 
 def _set_pagination(body: Dict[str, Any], page_no: int) -> Dict[str, Any]:
     """Best-effort pagination for both APIs"""
@@ -47,32 +49,71 @@ def _find_products_list(obj: Any) -> List[Dict[str, Any]]:
             stack.extend(cur)
     return out
 
-def fetch_products_page(
-    template: ApiTemplate, page_no: int, timeout: int = 45
-) -> tuple[Optional[int], List[Dict[str, Any]], str]:
-    """Fetch one page of products via API"""
+def iter_products(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Product-like objects from a streamed body, one at a time (see jsonstream).
+    Chunks are kept only until the first product turns up; a body with no
+    product under items/products arrays is then walked whole, like
+    _find_products_list on the parsed document.
+    """
+    head: Optional[List[bytes]] = []
+
+    def tee() -> Iterator[bytes]:
+        for chunk in chunks:
+            if head is not None:
+                head.append(bytes(chunk))
+            yield chunk
+
+    for el in iter_array_elements(tee()):
+        for product in _find_products_list(el):
+            head = None
+            yield product
+    if head is not None:
+        yield from _find_products_list(json.loads(b"".join(head)))
+
+def _request(template: ApiTemplate, page_no: int, timeout: int, stream: bool) -> requests.Response:
     sess = requests.Session()
     body = _set_pagination(template.body, page_no)
-
-    resp = sess.request(
+    return sess.request(
         method=template.method,
         url=template.endpoint,
         headers=template.headers,
         cookies=template.cookies,
         json=body,
         timeout=timeout,
+        stream=stream,
     )
 
-    status = resp.status_code
-    note = f"HTTP {status}"
-    
-    if status != 200:
-        return status, [], (note + f" body={resp.text[:200]}")
-    
-    try:
-        data = resp.json()
-    except Exception:
-        return status, [], "JSON decode failed"
-
-    products = _find_products_list(data)
+def iter_products_page(template: ApiTemplate, page_no: int, timeout: int = 45) -> Iterator[Dict[str, Any]]:
+    """Stream one page of products as the body arrives; memory stays bounded for any page size"""
+    with _request(template, page_no, timeout, stream=True) as resp:
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code} body={resp.text[:200]}")
+        yield from iter_products(resp.iter_content(CHUNK_SIZE))
+
+def fetch_products_page(
+    template: ApiTemplate, page_no: int, timeout: int = 45, stream: Optional[bool] = None
+) -> tuple[Optional[int], List[Dict[str, Any]], str]:
+    """
+    Fetch one page of products via API (stream: parse incrementally, default
+    settings.stream_json). The products are still returned as one list; only
+    iter_products_page keeps memory bounded for large pages.
+    """
+    if stream is None:
+        stream = settings.stream_json
+    with _request(template, page_no, timeout, stream) as resp:
+        status = resp.status_code
+        note = f"HTTP {status}"
+
+        if status != 200:
+            return status, [], (note + f" body={resp.text[:200]}")
+
+        try:
+            if stream:
+                products = list(iter_products(resp.iter_content(CHUNK_SIZE)))
+            else:
+                products = _find_products_list(resp.json())
+        except Exception:
+            return status, [], "JSON decode failed"
+
     return status, products, f"products_found={len(products)}"
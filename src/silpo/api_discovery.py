@@ -2,9 +2,9 @@ import json
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
-from playwright.sync_api import sync_playwright
-
+from .browser import BrowserSession
 from .config import settings
+from .metrics import RunMetrics
 
 @dataclass
 class ApiTemplate:
@@ -15,21 +15,26 @@ class ApiTemplate:
     cookies: Dict[str, str]
     body: Dict[str, Any]
 
-def discover_get_category_products_template() -> ApiTemplate:
+def discover_get_category_products_template(
+    metrics: Optional[RunMetrics] = None,
+    session: Optional[BrowserSession] = None,
+) -> ApiTemplate:
     """
     Try to capture real API request from browser network.
     If fails, fallback to ALT API (catalog) if enabled.
+    Runs in `session`'s shared context (so scraping afterwards reuses its
+    cookies and clearance); without one, a session is started just for this call.
+    Timings go to `metrics` as discovery_* phases.
     """
+    metrics = metrics or RunMetrics("")
     captured: Optional[ApiTemplate] = None
     target = "product-api.silpo.ua/api/v1/Product/GetCategoryProducts"
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=settings.headless)
-        ctx = browser.new_context(
-            user_agent=settings.user_agent,
-            locale="uk-UA",
-            viewport={"width": 1366, "height": 900},
-        )
+    own_session = session is None
+    if own_session:
+        session = BrowserSession(metrics=metrics)
+    try:
+        ctx = session.context()
         page = ctx.new_page()
 
         def on_request(req):
@@ -61,9 +66,14 @@ def discover_get_category_products_template() -> ApiTemplate:
                 )
 
         page.on("request", on_request)
-        page.goto(settings.category_url, wait_until="domcontentloaded")
-        page.wait_for_load_state("networkidle")
-        browser.close()
+        with metrics.span("discovery_navigate"):
+            page.goto(settings.category_url, wait_until="domcontentloaded")
+        with metrics.span("discovery_networkidle"):
+            page.wait_for_load_state("networkidle")
+        page.close()
+    finally:
+        if own_session:
+            session.close()
 
     if captured:
         return captured
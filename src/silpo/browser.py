@@ -0,0 +1,126 @@
+import json
+import os
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from .config import settings
+from .metrics import RunMetrics
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Browser, BrowserContext, Page, Playwright
+
+class BrowserSession:
+    """
+    One Chromium per run; scraper.scrape (and api_discovery, when a caller
+    runs it) open their pages in it.
+
+    context() is a single shared context, so cookies, HTTP cache and the
+    Cloudflare clearance carry over from page to page and stage to stage. Its
+    storage_state is loaded from `state_path` when the context is created and
+    saved back on close(), so the next run starts warm as well. The file holds
+    session credentials and is written with mode 0600.
+    """
+    def __init__(
+        self,
+        state_path: Optional[str] = settings.storage_state_path,
+        headless: bool = settings.headless,
+        metrics: Optional[RunMetrics] = None,
+    ):
+        self.state_path = state_path or None
+        self.headless = headless
+        self.metrics = metrics or RunMetrics("")
+        self.save_error: Optional[str] = None
+        self._keep_state = True
+        self._pw: Optional["Playwright"] = None
+        self._browser: Optional["Browser"] = None
+        self._context: Optional["BrowserContext"] = None
+
+    def start(self) -> "BrowserSession":
+        if self._browser is not None:
+            return self
+        # imported here so silpo modules load without playwright
+        from playwright.sync_api import sync_playwright
+        with self.metrics.span("browser_launch"):
+            self._pw = sync_playwright().start()
+            try:
+                self._browser = self._pw.chromium.launch(headless=self.headless)
+            except Exception:
+                self._pw.stop()
+                self._pw = None
+                raise
+        return self
+
+    def load_state(self) -> Optional[Dict[str, Any]]:
+        """Persisted storage_state, or None if missing/unreadable."""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if isinstance(state, dict) else None
+
+    def new_context(self, **overrides: Any) -> "BrowserContext":
+        """A fresh context with the run defaults and the persisted storage_state."""
+        self.start()
+        opts: Dict[str, Any] = {
+            "user_agent": settings.user_agent,
+            "locale": "uk-UA",
+            "timezone_id": "Europe/Kyiv",
+            "viewport": {"width": 1366, "height": 900},
+        }
+        state = self.load_state()
+        if state:
+            opts["storage_state"] = state
+        opts.update(overrides)
+        ctx = self._browser.new_context(**opts)
+        ctx.set_default_timeout(settings.timeout_ms)
+        return ctx
+
+    def context(self) -> "BrowserContext":
+        """The shared context (created on first use)."""
+        if self._context is None:
+            with self.metrics.span("browser_context"):
+                self._context = self.new_context()
+        return self._context
+
+    def new_page(self) -> "Page":
+        return self.context().new_page()
+
+    def save_state(self) -> Optional[str]:
+        """Atomically write the shared context's storage_state to state_path."""
+        if not self.state_path or not self._keep_state or self._context is None:
+            return None
+        state = self._context.storage_state()
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)  # cookies/clearance: owner only
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+        return self.state_path
+
+    def discard_state(self) -> None:
+        """Drop the persisted state and don't save this session's (e.g. after a challenge page)."""
+        self._keep_state = False
+        if self.state_path and os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def close(self) -> None:
+        try:
+            try:
+                self.save_state()
+            except Exception as e:  # a lost state file only costs the next run a cold start
+                self.save_error = f"{type(e).__name__}: {str(e)[:300]}"
+            if self._browser is not None:
+                self._browser.close()
+        finally:
+            if self._pw is not None:
+                self._pw.stop()
+            self._pw = self._browser = self._context = None
+
+    def __enter__(self) -> "BrowserSession":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+# `python -m silpo <command>`. Only argparse/json/os/sys are imported up front:
+# every command imports what it needs (playwright, openpyxl, pyarrow, ...)
+# inside its handler, so cron-driven query/export jobs start fast.
+# `bench` checks this stays true (the benchmark suite is `python -m benchmarks.run`).
+
+HEAVY_MODULES = ("playwright", "openpyxl", "pandas", "pyarrow", "numpy", "requests")
+
+def _settings():
+    from .config import settings
+    return settings
+
+def _connect(db_path: Optional[str]):
+    from .db import connect, init
+    conn = connect(db_path or _settings().db_path)
+    init(conn)
+    return conn
+
+def _print_rows(rows) -> None:
+    for r in rows:
+        print(json.dumps(r, ensure_ascii=False))
+
+def cmd_scrape(args) -> int:
+    from .run_full import main as run_main
+    run_main()
+    return 0
+
+def cmd_export(args) -> int:
+    s = _settings()
+    conn = _connect(args.db)
+    try:
+        run_id = args.run_id or (conn.execute(
+            "SELECT run_id FROM runs ORDER BY started_at DESC LIMIT 1"
+        ).fetchone() or [None])[0]
+        if run_id is None:
+            print("no runs in database", file=sys.stderr)
+            return 1
+        out: Dict[str, object] = {"run_id": run_id}
+        if not (args.history_only or args.dataset_only):
+            from .exporter import export_xlsx_csv
+            out["xlsx"], out["csv"] = export_xlsx_csv(conn, args.exports_dir or s.exports_dir, run_id)
+        if args.history or args.history_only:
+            from .exporter import export_history
+            out["history"], out["history_appended"] = export_history(conn, args.exports_dir or s.exports_dir)
+        if args.dataset or args.dataset_only:
+            from .dataset import export_dataset
+            out["dataset"] = export_dataset(conn, args.dataset_dir or s.dataset_dir, run_id)
+        print(json.dumps(out, ensure_ascii=False))
+        return 0
+    finally:
+        conn.close()
+
+def _missing_db(db_path: str) -> bool:
+    if os.path.exists(db_path):
+        return False
+    print(f"database not found: {db_path} (run `silpo scrape` first or pass --db)", file=sys.stderr)
+    return True
+
+def cmd_query(args) -> int:
+    from . import query
+    db_path = args.db or _settings().db_path
+    if _missing_db(db_path):
+        return 1
+    conn = query.connect_readonly(db_path)  # no schema init, never takes the write lock
+    try:
+        if args.what == "latest":
+            if args.product_id:
+                row = query.latest_price(conn, args.product_id)
+                _print_rows([row] if row else [])
+            else:
+                _print_rows(query.latest_prices(conn, limit=args.limit, offset=args.offset))
+        elif args.what == "history":
+            _print_rows(query.price_history(conn, args.product_id, args.since, args.until))
+        elif args.what == "changes":
+            _print_rows(query.price_changes(conn, args.run_from, args.run_to, args.min_change))
+        elif args.what == "discounts":
+            _print_rows(query.top_discounts(conn, limit=args.limit))
+        elif args.what == "cheapest":
+            _print_rows(query.cheapest_per_unit(conn, args.product_type, args.unit, args.fat, args.day, args.limit))
+        elif args.what == "metrics":
+            if args.runs:
+                _print_rows(query.phase_latency(conn, args.phase, args.runs))
+            else:
+                _print_rows({"phase": k, **v} for k, v in query.run_metrics(conn, args.run_id).items())
+        return 0
+    finally:
+        conn.close()
+
+def cmd_serve(args) -> int:
+    from .serve import serve
+    s = _settings()
+    db_path = args.db or s.db_path
+    if _missing_db(db_path):
+        return 1
+    serve(db_path, args.host or s.serve_host, args.port or s.serve_port, args.check_interval)
+    return 0
+
+def cmd_maintain(args) -> int:
+    from .maintenance import main as maintenance_main
+    maintenance_main((["--db", args.db] if args.db else []) + args.rest)
+    return 0
+
+def _import_times(stderr: str) -> List[tuple]:
+    """(cumulative_us, module, top_level) per line of `-X importtime` output."""
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue  # header line
+        name = parts[2].rstrip()
+        out.append((cumulative, name.strip(), not name.startswith("  ")))
+    return out
+
+def startup_check(command: List[str], budget_ms: float) -> Dict[str, object]:
+    """
+    Run `python -X importtime -m silpo <command>` and report import cost.
+    Modules a bare interpreter already imports (site, encodings, runpy for -m)
+    are reported as interpreter_ms and do not count against the budget.
+    """
+    import subprocess
+    import time
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (src_dir, env.get("PYTHONPATH")) if p)
+    baseline = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import runpy"],
+        capture_output=True, text=True, env=env,
+    )
+    interpreter = {mod for _, mod, _ in _import_times(baseline.stderr)}
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "silpo", *command],
+        capture_output=True, text=True, env=env,
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+
+    top: List[tuple] = []   # (cumulative_us, module) of top-level imports made by silpo
+    interpreter_us = 0
+    heavy = set()
+    for cumulative, mod, top_level in _import_times(proc.stderr):
+        if mod.split(".")[0] in HEAVY_MODULES:
+            heavy.add(mod.split(".")[0])
+        if not top_level:
+            continue
+        if mod in interpreter:
+            interpreter_us += cumulative
+        else:
+            top.append((cumulative, mod))
+    imports_ms = sum(c for c, _ in top) / 1000.0
+    return {
+        "command": command,
+        "exit_code": proc.returncode,
+        "wall_ms": round(wall_ms, 1),
+        "interpreter_ms": round(interpreter_us / 1000.0, 1),
+        "imports_ms": round(imports_ms, 1),
+        "budget_ms": budget_ms,
+        "heavy_imports": sorted(heavy),
+        "slowest": [{"module": m, "ms": round(c / 1000.0, 2)} for c, m in sorted(top, reverse=True)[:10]],
+        "ok": proc.returncode == 0 and not heavy and imports_ms <= budget_ms,
+    }
+
+def cmd_bench(args) -> int:
+    result = startup_check(args.command or ["query", "--help"], args.budget_ms)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0 if result["ok"] else 1
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="silpo", description="Silpo scraper, exports and price queries")
+    ap.add_argument("--db", default=None, help="SQLite path (default: SILPO_DB_PATH)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("scrape", help="run a full scrape (browser, DB, exports)")
+    p.set_defaults(func=cmd_scrape)
+
+    p = sub.add_parser("export", help="export a run from the DB")
+    p.add_argument("--run-id", default=None, help="default: latest run")
+    p.add_argument("--exports-dir", default=None)
+    p.add_argument("--dataset-dir", default=None)
+    p.add_argument("--history", action="store_true", help="also append to history.csv.gz")
+    p.add_argument("--dataset", action="store_true", help="also write the columnar dataset partition")
+    p.add_argument("--history-only", action="store_true")
+    p.add_argument("--dataset-only", action="store_true")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("query", help="price lookups (JSON lines)")
+    q = p.add_subparsers(dest="what", required=True)
+    qp = q.add_parser("latest", help="latest price of all products or one")
+    qp.add_argument("--product-id", default=None)
+    qp.add_argument("--limit", type=int, default=1000)
+    qp.add_argument("--offset", type=int, default=0)
+    qp = q.add_parser("history", help="price history of one product")
+    qp.add_argument("product_id")
+    qp.add_argument("--since", default=None)
+    qp.add_argument("--until", default=None)
+    qp = q.add_parser("changes", help="price changes between two runs")
+    qp.add_argument("run_from")
+    qp.add_argument("run_to")
+    qp.add_argument("--min-change", type=float, default=0.0)
+    qp = q.add_parser("discounts", help="largest current discounts")
+    qp.add_argument("--limit", type=int, default=20)
+    qp = q.add_parser("cheapest", help="cheapest per kg/l/piece, e.g. cheapest молоко --unit l --fat 2.5")
+    qp.add_argument("product_type")
+    qp.add_argument("--unit", default="l", choices=["l", "kg", "piece"])
+    qp.add_argument("--fat", type=float, default=None)
+    qp.add_argument("--day", default=None)
+    qp.add_argument("--limit", type=int, default=10)
+    qp = q.add_parser("metrics", help="phase timings of a run, or --runs N for p50/p95 of --phase across runs")
+    qp.add_argument("--run-id", default=None, help="default: latest run")
+    qp.add_argument("--phase", default="page")
+    qp.add_argument("--runs", type=int, default=0)
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser("serve", help="read-only HTTP/JSON service (latest prices, history, category snapshots)")
+    p.add_argument("--host", default=None, help="default: SILPO_SERVE_HOST")
+    p.add_argument("--port", type=int, default=None, help="default: SILPO_SERVE_PORT")
+    p.add_argument("--check-interval", type=float, default=1.0, help="seconds between checks for a new OK run")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("maintain", help="roll-up / retention / archive / vacuum (see maintenance.py)")
+    p.add_argument("rest", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_maintain)
+
+    p = sub.add_parser("bench", help="-X importtime check of a command's startup cost (suite: python -m benchmarks.run)")
+    p.add_argument("--budget-ms", type=float, default=50.0)
+    p.add_argument("command", nargs=argparse.REMAINDER, help="command to check, default: query --help")
+    p.set_defaults(func=cmd_bench)
+    return ap
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = build_parser()
+    args, extra = ap.parse_known_args(argv)
+    if extra:
+        if args.cmd != "maintain":
+            ap.error(f"unrecognized arguments: {' '.join(extra)}")
+        args.rest = extra + args.rest  # maintenance.py parses its own options
+    return args.func(args)
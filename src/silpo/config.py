@@ -13,10 +13,33 @@ class Settings:
     headless: bool = os.getenv("SILPO_HEADLESS", "true").lower() in ("1", "true", "yes")
     timeout_ms: int = int(os.getenv("SILPO_TIMEOUT_MS", "60000"))
 
+    # API page size (ALT catalog API) and whether to fall back to it when discovery fails
+    per_page: int = int(os.getenv("SILPO_PER_PAGE", "100"))
+    use_alt_api: bool = os.getenv("SILPO_USE_ALT_API", "true").lower() in ("1", "true", "yes")
+    # Parse JSON responses incrementally (jsonstream) instead of building the whole object graph
+    stream_json: bool = os.getenv("SILPO_STREAM_JSON", "true").lower() in ("1", "true", "yes")
+
     data_dir: str = os.getenv("SILPO_DATA_DIR", "data")
     db_path: str = os.getenv("SILPO_DB_PATH", "data/silpo.sqlite")
     logs_dir: str = os.getenv("SILPO_LOGS_DIR", "data/logs")
     exports_dir: str = os.getenv("SILPO_EXPORTS_DIR", "data/exports")
+    dataset_dir: str = os.getenv("SILPO_DATASET_DIR", "data/dataset")
+    archive_dir: str = os.getenv("SILPO_ARCHIVE_DIR", "data/archive")
+
+    # Browser storage_state (cookies, Cloudflare clearance) reused across runs; empty = off
+    storage_state_path: str = os.getenv("SILPO_STORAGE_STATE", "data/browser_state.json")
+
+    # Read service (`silpo serve`)
+    serve_host: str = os.getenv("SILPO_SERVE_HOST", "127.0.0.1")
+    serve_port: int = int(os.getenv("SILPO_SERVE_PORT", "8080"))
+
+    # Prometheus textfile-collector output (empty = off), written at the end of each run
+    metrics_textfile: str = os.getenv("SILPO_METRICS_TEXTFILE", "")
+
+    # Retention (days) used by maintenance.py
+    raw_json_retention_days: int = int(os.getenv("SILPO_RAW_JSON_RETENTION_DAYS", "30"))
+    events_retention_days: int = int(os.getenv("SILPO_EVENTS_RETENTION_DAYS", "30"))
+    archive_after_days: int = int(os.getenv("SILPO_ARCHIVE_AFTER_DAYS", "180"))
 
     user_agent: str = os.getenv(
         "SILPO_USER_AGENT",
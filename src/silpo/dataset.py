@@ -0,0 +1,139 @@
+import csv
+import glob
+import gzip
+import json
+import os
+import re
+import sqlite3
+from typing import List, Optional
+
+# Columnar analytics dataset, one file per run, hive-partitioned:
+#   <dataset_dir>/run_date=YYYY-MM-DD/category=<slug>/part-<run_id>.parquet
+# Parquet (zstd) when pyarrow is installed, otherwise gzip CSV plus a
+# _schema.json with the column dtypes. Each run only adds its own partition file.
+
+COLUMNS = [
+    ("run_id", "string"),
+    ("upload_ts", "string"),
+    ("page_number", "int32"),
+    ("source", "string"),
+    ("product_id", "string"),
+    ("product_url", "string"),
+    ("title", "string"),
+    ("brand", "string"),
+    ("pack_qty", "float64"),
+    ("pack_unit", "string"),
+    ("price_current", "float64"),
+    ("price_old", "float64"),
+    ("discount_pct", "float64"),
+]
+
+BATCH_ROWS = 50_000
+
+def _have_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def category_slug(category_url: str) -> str:
+    slug = category_url.rstrip("/").rsplit("/", 1)[-1]
+    return re.sub(r"[^0-9A-Za-z_-]+", "_", slug) or "unknown"
+
+def _arrow_schema():
+    import pyarrow as pa
+    types = {"string": pa.string(), "int32": pa.int32(), "float64": pa.float64()}
+    return pa.schema([(name, types[t]) for name, t in COLUMNS])
+
+def export_dataset(conn: sqlite3.Connection, dataset_dir: str, run_id: str, fmt: str = "auto") -> str:
+    """Write (or overwrite) the partition file of one run; returns its path."""
+    started_at, category_url = conn.execute(
+        "SELECT started_at, category_url FROM runs WHERE run_id=?", (run_id,)
+    ).fetchone()
+    part_dir = os.path.join(dataset_dir, f"run_date={started_at[:10]}", f"category={category_slug(category_url)}")
+    os.makedirs(part_dir, exist_ok=True)
+    if fmt == "auto":
+        fmt = "parquet" if _have_pyarrow() else "csv.gz"
+
+    cur = conn.execute(
+        f"SELECT {', '.join(name for name, _ in COLUMNS)} FROM products WHERE run_id=? ORDER BY id",
+        (run_id,),
+    )
+    path = os.path.join(part_dir, f"part-{run_id[:8]}.{fmt}")
+    tmp = path + ".tmp"
+
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = _arrow_schema()
+        with pq.ParquetWriter(tmp, schema, compression="zstd") as w:
+            while True:
+                rows = cur.fetchmany(BATCH_ROWS)
+                if not rows:
+                    break
+                cols = list(zip(*rows))
+                w.write_table(pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(cols, schema)], schema=schema))
+    elif fmt == "csv.gz":
+        with open(os.path.join(dataset_dir, "_schema.json"), "w", encoding="utf-8") as f:
+            json.dump(dict(COLUMNS), f)
+        with gzip.open(tmp, "wt", encoding="utf-8", newline="", compresslevel=6) as f:
+            w = csv.writer(f)
+            w.writerow([name for name, _ in COLUMNS])
+            while True:
+                rows = cur.fetchmany(BATCH_ROWS)
+                if not rows:
+                    break
+                w.writerows(rows)
+    else:
+        raise ValueError(f"unknown dataset format: {fmt}")
+
+    os.replace(tmp, path)
+    return path
+
+def read_dataset(
+    dataset_dir: str,
+    columns: Optional[List[str]] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    category: Optional[str] = None,
+):
+    """
+    Load the dataset into a pandas DataFrame, reading only the requested columns
+    and only partitions within [date_from, date_to] (YYYY-MM-DD) / category.
+    """
+    import pandas as pd
+
+    parts = []
+    for path in sorted(glob.glob(os.path.join(dataset_dir, "run_date=*", "category=*", "part-*"))):
+        if path.endswith(".tmp"):
+            continue
+        cat_dir = os.path.dirname(path)
+        run_date = os.path.basename(os.path.dirname(cat_dir)).split("=", 1)[1]
+        cat = os.path.basename(cat_dir).split("=", 1)[1]
+        if (date_from and run_date < date_from) or (date_to and run_date > date_to):
+            continue
+        if category and cat != category:
+            continue
+        parts.append((path, run_date, cat))
+    if not parts:
+        return pd.DataFrame(columns=columns or [name for name, _ in COLUMNS])
+
+    dtypes = dict(COLUMNS)
+    frames = []
+    for path, run_date, cat in parts:
+        if path.endswith(".parquet"):
+            df = pd.read_parquet(path, columns=columns)
+        else:
+            usecols = columns or list(dtypes)
+            df = pd.read_csv(
+                path, usecols=usecols, compression="gzip",
+                dtype={c: ("Int32" if dtypes[c] == "int32" else dtypes[c]) for c in usecols},
+            )
+        df["run_date"] = run_date
+        df["category"] = cat
+        frames.append(df)
+    out = pd.concat(frames, ignore_index=True)
+    out["run_date"] = out["run_date"].astype("category")
+    out["category"] = out["category"].astype("category")
+    return out
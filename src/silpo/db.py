@@ -1,8 +1,10 @@
 import sqlite3
-from typing import Iterable, List
-from .model import ProductRow, PageLogRow, LogEvent
+from typing import Dict, Iterable, Iterator, List, Tuple
+from .extractors import compute_price_per_unit, extract_fat_pct, extract_pack, extract_product_type, to_float
+from .model import Pack, ProductBatch, ProductRow, PageLogRow, LogEvent, Rows
 
 SCHEMA = """
+PRAGMA auto_vacuum=INCREMENTAL;
 PRAGMA journal_mode=WAL;
 PRAGMA foreign_keys=ON;
 
@@ -34,6 +36,7 @@ CREATE TABLE IF NOT EXISTS products (
   price_old REAL,
   discount_pct REAL,
   raw_json TEXT,
+  link_score REAL,
   FOREIGN KEY(run_id) REFERENCES runs(run_id)
 );
 
@@ -49,6 +52,7 @@ CREATE TABLE IF NOT EXISTS page_logs (
   items_seen INTEGER NOT NULL,
   items_saved INTEGER NOT NULL,
   note TEXT,
+  items_dup INTEGER NOT NULL DEFAULT 0,
   FOREIGN KEY(run_id) REFERENCES runs(run_id)
 );
 
@@ -62,84 +66,297 @@ CREATE TABLE IF NOT EXISTS events (
   FOREIGN KEY(run_id) REFERENCES runs(run_id)
 );
 
+CREATE TABLE IF NOT EXISTS latest_prices (
+  product_id TEXT PRIMARY KEY,
+  run_id TEXT NOT NULL,
+  upload_ts TEXT NOT NULL,
+  title TEXT,
+  brand TEXT,
+  pack_qty REAL,
+  pack_unit TEXT,
+  price_current REAL,
+  price_old REAL,
+  discount_pct REAL
+) WITHOUT ROWID;
+
+-- price per kg / l / piece, one row per product and run (refresh_unit_prices)
+CREATE TABLE IF NOT EXISTS unit_prices (
+  run_id TEXT NOT NULL,
+  product_id TEXT NOT NULL,
+  day TEXT NOT NULL,
+  upload_ts TEXT NOT NULL,
+  title TEXT,
+  brand TEXT,
+  product_type TEXT NOT NULL,
+  fat_pct REAL,
+  unit_basis TEXT NOT NULL,
+  price_current REAL NOT NULL,
+  price_per_unit REAL NOT NULL,
+  type_rank INTEGER NOT NULL,
+  PRIMARY KEY(run_id, product_id)
+) WITHOUT ROWID;
+
+-- high-water marks of incremental exports (exporter.export_history)
+CREATE TABLE IF NOT EXISTS export_state (
+  name TEXT PRIMARY KEY,
+  schema_version INTEGER NOT NULL,
+  last_product_id INTEGER NOT NULL,
+  file_bytes INTEGER NOT NULL,
+  updated_at TEXT NOT NULL
+);
+
+-- timing spans of each run (metrics.RunMetrics); page_number NULL = run-level phase
+CREATE TABLE IF NOT EXISTS run_metrics (
+  run_id TEXT NOT NULL,
+  seq INTEGER NOT NULL,
+  phase TEXT NOT NULL,
+  page_number INTEGER,
+  started_at TEXT NOT NULL,
+  duration_ms REAL NOT NULL,
+  items INTEGER,
+  PRIMARY KEY(run_id, seq),
+  FOREIGN KEY(run_id) REFERENCES runs(run_id)
+) WITHOUT ROWID;
+
+-- roll-ups written by maintenance.py
+CREATE TABLE IF NOT EXISTS price_daily (
+  product_id TEXT NOT NULL,
+  day TEXT NOT NULL,
+  title TEXT,
+  price_min REAL,
+  price_max REAL,
+  price_avg REAL,
+  price_old_max REAL,
+  n_obs INTEGER NOT NULL,
+  PRIMARY KEY(product_id, day)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS price_weekly (
+  product_id TEXT NOT NULL,
+  week TEXT NOT NULL,          -- ISO 8601 year-week, e.g. 2025-W01
+  title TEXT,
+  price_min REAL,
+  price_max REAL,
+  price_avg REAL,
+  price_old_max REAL,
+  n_obs INTEGER NOT NULL,
+  week_start TEXT,             -- Monday of the week
+  PRIMARY KEY(product_id, week)
+) WITHOUT ROWID;
+
 CREATE INDEX IF NOT EXISTS idx_products_run ON products(run_id);
+CREATE INDEX IF NOT EXISTS idx_products_ts ON products(upload_ts);
+-- covering indexes for per-product history and run-to-run diffs (see query.py)
+CREATE INDEX IF NOT EXISTS idx_products_pid_ts ON products(product_id, upload_ts, price_current, price_old, discount_pct);
+CREATE INDEX IF NOT EXISTS idx_products_run_pid ON products(run_id, product_id, price_current);
+CREATE INDEX IF NOT EXISTS idx_latest_discount ON latest_prices(discount_pct);
+CREATE INDEX IF NOT EXISTS idx_unit_prices_lookup ON unit_prices(day, product_type, unit_basis, fat_pct, price_per_unit);
+CREATE INDEX IF NOT EXISTS idx_unit_prices_pid ON unit_prices(product_id, day);
 CREATE INDEX IF NOT EXISTS idx_pagelogs_run ON page_logs(run_id);
 CREATE INDEX IF NOT EXISTS idx_events_run ON events(run_id);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts);
+CREATE INDEX IF NOT EXISTS idx_run_metrics_phase ON run_metrics(phase, run_id, duration_ms);
 """
 
+# Columns added after the first release: (table, column, declaration).
+# CREATE TABLE IF NOT EXISTS does not touch existing tables, so init() adds them.
+MIGRATIONS = [
+    ("page_logs", "items_dup", "INTEGER NOT NULL DEFAULT 0"),
+    ("products", "link_score", "REAL"),
+    ("price_weekly", "week_start", "TEXT"),
+]
+
 def connect(db_path: str) -> sqlite3.Connection:
     conn = sqlite3.connect(db_path)
     conn.execute("PRAGMA foreign_keys=ON;")
     return conn
 
 def init(conn: sqlite3.Connection) -> None:
+    for table, column, decl in MIGRATIONS:
+        cols = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+        if cols and column not in cols:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
     conn.executescript(SCHEMA)
     conn.commit()
 
-def insert_run(conn: sqlite3.Connection, run_id: str, started_at: str, category_url: str, max_pages: int, headless: bool) -> None:
+# Write helpers commit by default; the single writer (writer.py) passes
+# commit=False and commits a whole group of messages in one transaction.
+
+def insert_run(conn: sqlite3.Connection, run_id: str, started_at: str, category_url: str, max_pages: int, headless: bool, commit: bool = True) -> None:
     conn.execute(
         "INSERT INTO runs(run_id, started_at, category_url, max_pages, headless, status) VALUES(?,?,?,?,?,?)",
         (run_id, started_at, category_url, max_pages, 1 if headless else 0, "RUNNING"),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
 
-def finish_run(conn: sqlite3.Connection, run_id: str, finished_at: str, status: str, note: str) -> None:
+def finish_run(conn: sqlite3.Connection, run_id: str, finished_at: str, status: str, note: str, commit: bool = True) -> None:
     conn.execute(
         "UPDATE runs SET finished_at=?, status=?, note=? WHERE run_id=?",
         (finished_at, status, note, run_id),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
 
-def insert_products(conn: sqlite3.Connection, rows: Iterable[ProductRow]) -> int:
-    cur = conn.cursor()
-    n = 0
-    for r in rows:
-        cur.execute(
-            """
-            INSERT INTO products(
-              run_id, upload_ts, page_number, page_url, source,
-              product_id, product_url, title, brand, pack_qty, pack_unit,
-              price_current, price_old, discount_pct, raw_json
-            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-            """,
-            (
-                r.run_id, r.upload_ts, r.page_number, r.page_url, r.source,
-                r.product_id, r.product_url, r.title, r.brand, r.pack_qty, r.pack_unit,
-                r.price_current, r.price_old, r.discount_pct, r.raw_json
-            ),
-        )
-        n += 1
+PRODUCTS_INSERT = """
+INSERT INTO products(
+  run_id, upload_ts, page_number, page_url, source,
+  product_id, product_url, title, brand, pack_qty, pack_unit,
+  price_current, price_old, discount_pct, raw_json, link_score
+) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+PAGE_LOGS_INSERT = """
+INSERT INTO page_logs(
+  run_id, upload_ts, page_number, page_url, method, status, http_status,
+  items_seen, items_saved, note, items_dup
+) VALUES (?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+EVENTS_INSERT = "INSERT INTO events(run_id, ts, level, event, message) VALUES (?,?,?,?,?)"
+
+RUN_METRICS_INSERT = """
+INSERT OR REPLACE INTO run_metrics(run_id, seq, phase, page_number, started_at, duration_ms, items)
+VALUES (?,?,?,?,?,?,?)
+"""
+
+def product_values(r: ProductRow) -> tuple:
+    return (
+        r.run_id, r.upload_ts, r.page_number, r.page_url, r.source,
+        r.product_id, r.product_url, r.title, r.brand, r.pack_qty, r.pack_unit,
+        r.price_current, r.price_old, r.discount_pct, r.raw_json, r.link_score
+    )
+
+def products_values(rows: Rows) -> Iterator[tuple]:
+    if isinstance(rows, ProductBatch):
+        return rows.db_values()
+    return (product_values(r) for r in rows)
+
+def page_log_values(r: PageLogRow) -> tuple:
+    return (
+        r.run_id, r.upload_ts, r.page_number, r.page_url, r.method, r.status, r.http_status,
+        r.items_seen, r.items_saved, r.note, r.items_dup
+    )
+
+def event_values(run_id: str, e: LogEvent) -> tuple:
+    return (run_id, e.ts, e.level, e.event, e.message)
+
+def insert_products(conn: sqlite3.Connection, rows: Rows) -> int:
+    cur = conn.executemany(PRODUCTS_INSERT, products_values(rows))
     conn.commit()
-    return n
+    return cur.rowcount
 
 def insert_page_logs(conn: sqlite3.Connection, rows: Iterable[PageLogRow]) -> int:
-    cur = conn.cursor()
-    n = 0
-    for r in rows:
-        cur.execute(
-            """
-            INSERT INTO page_logs(
-              run_id, upload_ts, page_number, page_url, method, status, http_status,
-              items_seen, items_saved, note
-            ) VALUES (?,?,?,?,?,?,?,?,?,?)
-            """,
-            (
-                r.run_id, r.upload_ts, r.page_number, r.page_url, r.method, r.status, r.http_status,
-                r.items_seen, r.items_saved, r.note
-            ),
-        )
-        n += 1
+    cur = conn.executemany(PAGE_LOGS_INSERT, (page_log_values(r) for r in rows))
     conn.commit()
-    return n
+    return cur.rowcount
 
 def insert_events(conn: sqlite3.Connection, run_id: str, events: List[LogEvent]) -> int:
-    cur = conn.cursor()
-    n = 0
-    for e in events:
-        cur.execute(
-            "INSERT INTO events(run_id, ts, level, event, message) VALUES (?,?,?,?,?)",
-            (run_id, e.ts, e.level, e.event, e.message),
-        )
-        n += 1
+    cur = conn.executemany(EVENTS_INSERT, (event_values(run_id, e) for e in events))
     conn.commit()
-    return n
+    return cur.rowcount
+
+def insert_run_metrics(conn: sqlite3.Connection, values: List[tuple]) -> int:
+    cur = conn.executemany(RUN_METRICS_INSERT, values)
+    conn.commit()
+    return cur.rowcount
+
+def refresh_latest_prices(conn: sqlite3.Connection, run_id: str, commit: bool = True) -> int:
+    """
+    Fold one run's API rows into latest_prices (newer upload_ts wins). DOM rows
+    are left out even when linker.py gave them a product_id: their title is
+    scraped card text, and latest_prices is also the linker's index.
+    """
+    cur = conn.execute(
+        """
+        INSERT INTO latest_prices(
+          product_id, run_id, upload_ts, title, brand, pack_qty, pack_unit,
+          price_current, price_old, discount_pct
+        )
+        SELECT product_id, run_id, upload_ts, title, brand, pack_qty, pack_unit,
+               price_current, price_old,
+               COALESCE(discount_pct,
+                        CASE WHEN price_old > 0 AND price_current IS NOT NULL
+                             THEN ROUND((price_old - price_current) * 100.0 / price_old, 2) END)
+        FROM products
+        WHERE run_id=? AND product_id IS NOT NULL AND price_current IS NOT NULL AND source <> 'dom'
+        GROUP BY product_id
+        HAVING id = MAX(id)
+        ON CONFLICT(product_id) DO UPDATE SET
+          run_id=excluded.run_id, upload_ts=excluded.upload_ts,
+          title=excluded.title, brand=excluded.brand,
+          pack_qty=excluded.pack_qty, pack_unit=excluded.pack_unit,
+          price_current=excluded.price_current, price_old=excluded.price_old,
+          discount_pct=excluded.discount_pct
+        WHERE excluded.upload_ts >= latest_prices.upload_ts
+        """,
+        (run_id,),
+    )
+    if commit:
+        conn.commit()
+    return cur.rowcount
+
+def save_export_state(
+    conn: sqlite3.Connection, name: str, schema_version: int, last_product_id: int, file_bytes: int,
+    updated_at: str, commit: bool = True,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO export_state(name, schema_version, last_product_id, file_bytes, updated_at)
+        VALUES (?,?,?,?,?)
+        ON CONFLICT(name) DO UPDATE SET
+          schema_version=excluded.schema_version, last_product_id=excluded.last_product_id,
+          file_bytes=excluded.file_bytes, updated_at=excluded.updated_at
+        """,
+        (name, schema_version, last_product_id, file_bytes, updated_at),
+    )
+    if commit:
+        conn.commit()
+
+UNIT_BASIS = {"мл": "l", "г": "kg", "шт": "piece"}
+
+def refresh_unit_prices(conn: sqlite3.Connection, run_id: str, commit: bool = True) -> int:
+    """Materialize price per kg/l/piece (with per-type ranks) for one run's API rows (see refresh_latest_prices)."""
+    rows = conn.execute(
+        """
+        SELECT product_id, upload_ts, title, brand, pack_qty, pack_unit, price_current
+        FROM products
+        WHERE run_id=? AND product_id IS NOT NULL AND price_current > 0 AND source <> 'dom'
+        ORDER BY id
+        """,
+        (run_id,),
+    ).fetchall()
+
+    out: Dict[str, list] = {}
+    for pid, ts, title, brand, qty, unit, price in rows:
+        title = title or ""
+        pack = Pack(qty=qty, unit=unit) if qty and unit else extract_pack(title)
+        ppu = compute_price_per_unit(price, pack)
+        if ppu is None:
+            continue
+        out[pid] = [
+            run_id, pid, ts[:10], ts, title, brand, extract_product_type(title),
+            to_float(extract_fat_pct(title)), UNIT_BASIS[pack.unit], price, ppu, 0,
+        ]
+
+    groups: Dict[Tuple[str, str], List[list]] = {}
+    for r in out.values():
+        groups.setdefault((r[6], r[8]), []).append(r)
+    for g in groups.values():
+        g.sort(key=lambda r: r[10])
+        for rank, r in enumerate(g, 1):
+            r[11] = rank
+
+    conn.execute("DELETE FROM unit_prices WHERE run_id=?", (run_id,))
+    conn.executemany(
+        """
+        INSERT INTO unit_prices(
+          run_id, product_id, day, upload_ts, title, brand, product_type, fat_pct,
+          unit_basis, price_current, price_per_unit, type_rank
+        ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+        """,
+        out.values(),
+    )
+    if commit:
+        conn.commit()
+    return len(out)
@@ -0,0 +1,77 @@
+import math
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from .extractors import dom_text, normalize_title
+from .model import ProductBatch
+
+# Per-run de-duplication. The same SKU is often captured several times: from the
+# listing and a recommendations block of one page, from nested variant objects,
+# and again on a neighbouring page when the listing shifts mid-crawl.
+#
+# Rows are keyed by product_id, then product_url. DOM rows without either are
+# keyed by their whole normalized card text (kept in raw_json as {"text": ...}):
+# their title is just the first line, often the price, so distinct products at
+# one price would collapse. Other rows fall back to normalized title + pack.
+# Within a page the highest-quality record wins; across pages the first page
+# that emitted a key keeps it (earlier pages are already written).
+
+def row_key(b: ProductBatch, i: int) -> Optional[Hashable]:
+    if b.product_id[i]:
+        return ("id", b.product_id[i])
+    if b.product_url[i]:
+        return ("url", b.product_url[i])
+    if b.source[i] == "dom":
+        t = normalize_title(dom_text(b.raw_json[i]) or b.title[i] or "")
+        return ("text", t) if t else None
+    t = normalize_title(b.title[i] or "")
+    if not t:
+        return None
+    pack_qty = b.pack_qty[i]
+    return ("title", t, None if math.isnan(pack_qty) else pack_qty, b.pack_unit[i] or "")
+
+def quality(b: ProductBatch, i: int) -> int:
+    """Higher is better: API over DOM, then the number of filled fields."""
+    q = 10 if b.source[i] == "api" else 0
+    for v in (b.product_id[i], b.product_url[i], b.title[i], b.brand[i], b.pack_unit[i]):
+        q += v is not None and v != ""
+    for v in (b.pack_qty[i], b.price_current[i], b.price_old[i], b.discount_pct[i]):
+        q += not math.isnan(v)
+    return q
+
+class RunDeduper:
+    """Hash index of keys already emitted in this run; O(1) per row."""
+    def __init__(self):
+        self._seen: Dict[Hashable, int] = {}  # key -> page_number that emitted it
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def filter(self, batch: ProductBatch) -> Tuple[ProductBatch, int]:
+        """Returns (batch without duplicates, number of rows dropped)."""
+        keep: List[int] = []              # rows without a usable key
+        best: Dict[Hashable, int] = {}    # key -> row index (insertion order = first seen)
+        dups = 0
+        for i in range(len(batch)):
+            k = row_key(batch, i)
+            if k is None:
+                keep.append(i)
+                continue
+            if k in self._seen:
+                dups += 1
+                continue
+            j = best.get(k)
+            if j is None:
+                best[k] = i
+            else:
+                dups += 1
+                if quality(batch, i) > quality(batch, j):
+                    best[k] = i
+        if not dups:
+            out = batch
+        else:
+            out = batch.take(sorted(keep + list(best.values())))
+        for k in best:
+            self._seen[k] = batch.page_number
+        self.duplicates += dups
+        return out, dups
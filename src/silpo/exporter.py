@@ -1,31 +1,147 @@
 import csv
+import gzip
 import os
-from datetime import datetime
-from typing import List, Tuple
+import shutil
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
 import sqlite3
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
+from . import db
+from .metrics import RunMetrics
+from .model import HEADER, PageLogRow
+from .writer import WriterClient
 
-def _autosize(ws):
-    for col in range(1, ws.max_column + 1):
-        max_len = 10
-        for row in range(1, min(ws.max_row, 5000) + 1):
-            v = ws.cell(row=row, column=col).value
-            if v is None:
-                continue
-            max_len = max(max_len, len(str(v)))
-        ws.column_dimensions[get_column_letter(col)].width = min(max(12, max_len + 2), 60)
+PRODUCT_HEADER = list(HEADER)
+PAGE_LOG_HEADER = ["upload_ts","page_number","page_url","method","status","http_status","items_seen","items_saved","items_dup","note"]
+LOG_HEADER = ["ts","level","event","message"]
+
+# Cumulative history export: bump when HISTORY_HEADER changes to force a rebuild
+HISTORY_SCHEMA_VERSION = 1
+HISTORY_HEADER = ["run_id"] + PRODUCT_HEADER
+# an unfinished run older than this is taken as crashed and no longer holds back the history
+IN_PROGRESS_MAX_AGE = timedelta(hours=12)
+
+# Column widths are derived from the header and the first rows of a sheet
+# (write-only sheets need them before the first row is written).
+WIDTH_SAMPLE_ROWS = 5000
+
+def _width(max_len: int) -> float:
+    return min(max(12, max_len + 2), 60)
+
+def stream_sheet(
+    wb: Workbook,
+    title: str,
+    header: Sequence[str],
+    rows: Iterable[Sequence],
+    on_row: Optional[Callable[[Sequence], None]] = None,
+) -> int:
+    """Stream rows into a write-only sheet; only the width sample is held in memory."""
+    ws = wb.create_sheet(title)
+    it = iter(rows)
+    sample = list(islice(it, WIDTH_SAMPLE_ROWS))
+
+    max_len = [max(10, len(h)) for h in header]
+    for r in sample:
+        for i, v in enumerate(r):
+            if v is not None:
+                n = len(str(v))
+                if n > max_len[i]:
+                    max_len[i] = n
+    for i, n in enumerate(max_len, 1):
+        ws.column_dimensions[get_column_letter(i)].width = _width(n)
+    ws.freeze_panes = "A2"
+
+    ws.append(list(header))
+    n = 0
+    for chunk in (sample, it):
+        for r in chunk:
+            ws.append(list(r))
+            if on_row is not None:
+                on_row(r)
+            n += 1
+    return n
+
+def publish_latest(src: str, latest: str) -> None:
+    """Atomically point latest.* at src (hardlink, copy if links are unsupported)."""
+    tmp = latest + ".tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, latest)
+
+def export_paths(exports_dir: str, run_id: str) -> Tuple[str, str]:
+    """Timestamped (xlsx, csv) paths of one run's export."""
+    os.makedirs(exports_dir, exist_ok=True)
+    ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    return (
+        os.path.join(exports_dir, f"silpo_{ts}_{run_id[:8]}.xlsx"),
+        os.path.join(exports_dir, f"silpo_{ts}_{run_id[:8]}.csv"),
+    )
+
+def log_sheets(
+    conn: sqlite3.Connection,
+    run_id: str,
+    log_events: Optional[List[dict]] = None,
+    page_logs: Optional[List[PageLogRow]] = None,
+) -> List[Tuple[str, Sequence[str], Iterable[Sequence]]]:
+    """(title, header, rows) of the page_logs and logs sheets, from memory when given, else from the DB."""
+    if page_logs is None:
+        pages: Iterable[Sequence] = conn.execute(
+            """
+            SELECT upload_ts, page_number, page_url, method, status, http_status, items_seen, items_saved, items_dup, note
+            FROM page_logs
+            WHERE run_id=?
+            ORDER BY page_number
+            """,
+            (run_id,),
+        )
+    else:
+        pages = (
+            [r.upload_ts, r.page_number, r.page_url, r.method, r.status, r.http_status,
+             r.items_seen, r.items_saved, r.items_dup, r.note]
+            for r in sorted(page_logs, key=lambda r: r.page_number)
+        )
+    if log_events is None:
+        events: Iterable[Sequence] = conn.execute(
+            "SELECT ts, level, event, message FROM events WHERE run_id=? ORDER BY id", (run_id,)
+        )
+    else:
+        events = ([e.get("ts",""), e.get("level",""), e.get("event",""), e.get("message","")] for e in log_events)
+    return [("page_logs", PAGE_LOG_HEADER, pages), ("logs", LOG_HEADER, events)]
+
+def publish_exports(exports_dir: str, xlsx_path: str, csv_path: str) -> Tuple[str, str]:
+    """Point latest.xlsx/latest.csv at a finished export; raises if any file is missing."""
+    latest_xlsx = os.path.join(exports_dir, "latest.xlsx")
+    latest_csv = os.path.join(exports_dir, "latest.csv")
+    publish_latest(xlsx_path, latest_xlsx)
+    publish_latest(csv_path, latest_csv)
+
+    # Hard guarantees (if these fail — run must be red)
+    for p in (xlsx_path, latest_xlsx, csv_path, latest_csv):
+        if not os.path.exists(p):
+            raise RuntimeError(f"Export file not created: {p}")
+    return latest_xlsx, latest_csv
 
 def export_xlsx_csv(
     conn: sqlite3.Connection,
     exports_dir: str,
     run_id: str,
-    log_events: List[dict],
+    log_events: Optional[List[dict]] = None,
+    metrics: Optional[RunMetrics] = None,
 ) -> Tuple[str, str]:
-    os.makedirs(exports_dir, exist_ok=True)
-    ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    """
+    Export a stored run from the DB (`silpo export`). A scrape writes the same
+    files while it runs, through CsvSink/XlsxSink, without this second pass.
+    """
+    metrics = metrics or RunMetrics(run_id)
+    xlsx_path, csv_path = export_paths(exports_dir, run_id)
 
-    # Fetch data
+    # Rows go straight from the cursor into the workbook and the CSV (products only)
     products = conn.execute(
         """
         SELECT upload_ts, page_number, page_url, source, product_id, product_url, title, brand,
@@ -35,67 +151,95 @@ def export_xlsx_csv(
         ORDER BY page_number, title
         """,
         (run_id,),
-    ).fetchall()
+    )
+
+    wb = Workbook(write_only=True)
+    with metrics.span("export_products") as sp, open(csv_path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(PRODUCT_HEADER)
+        sp["items"] = stream_sheet(wb, "products", PRODUCT_HEADER, products, on_row=w.writerow)
+    with metrics.span("export_logs") as sp:
+        sp["items"] = sum(stream_sheet(wb, *sheet) for sheet in log_sheets(conn, run_id, log_events))
+    with metrics.span("export_xlsx_save"):
+        wb.save(xlsx_path)
+
+    with metrics.span("export_publish"):
+        return publish_exports(exports_dir, xlsx_path, csv_path)
 
-    page_logs = conn.execute(
+def _history_high_water(conn: sqlite3.Connection, last_id: int, own_run_id: Optional[str]) -> int:
+    """
+    Highest products.id that is safe to export: below the first new row of any
+    run still in progress (other than `own_run_id`, whose rows are all written),
+    so rows a concurrent run commits later are never skipped.
+    """
+    max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM products").fetchone()[0]
+    stale = (datetime.now(timezone.utc) - IN_PROGRESS_MAX_AGE).isoformat()
+    first_open = conn.execute(
         """
-        SELECT upload_ts, page_number, page_url, method, status, http_status, items_seen, items_saved, note
-        FROM page_logs
-        WHERE run_id=?
-        ORDER BY page_number
+        SELECT MIN((SELECT MIN(id) FROM products p WHERE p.run_id = r.run_id AND p.id > ?))
+        FROM runs r
+        WHERE r.finished_at IS NULL AND r.started_at >= ? AND r.run_id IS NOT ?
         """,
-        (run_id,),
-    ).fetchall()
+        (last_id, stale, own_run_id),
+    ).fetchone()[0]
+    return max_id if first_open is None else min(max_id, first_open - 1)
 
-    # XLSX
-    wb = Workbook()
+def export_history(
+    conn: sqlite3.Connection,
+    exports_dir: str,
+    name: str = "history.csv.gz",
+    run_id: Optional[str] = None,
+    writer: Optional[WriterClient] = None,
+) -> Tuple[str, int]:
+    """
+    Append products not exported yet to a cumulative gzip CSV.
 
-    ws = wb.active
-    ws.title = "products"
-    prod_header = ["upload_ts","page_number","page_url","source","product_id","product_url","title","brand","pack_qty","pack_unit","price_current","price_old","discount_pct"]
-    ws.append(prod_header)
-    for r in products:
-        ws.append(list(r))
-    ws.freeze_panes = "A2"
-    _autosize(ws)
-
-    ws2 = wb.create_sheet("page_logs")
-    pl_header = ["upload_ts","page_number","page_url","method","status","http_status","items_seen","items_saved","note"]
-    ws2.append(pl_header)
-    for r in page_logs:
-        ws2.append(list(r))
-    ws2.freeze_panes = "A2"
-    _autosize(ws2)
-
-    ws3 = wb.create_sheet("logs")
-    ws3.append(["ts","level","event","message"])
-    for e in log_events:
-        ws3.append([e.get("ts",""), e.get("level",""), e.get("event",""), e.get("message","")])
-    ws3.freeze_panes = "A2"
-    _autosize(ws3)
-
-    xlsx_path = os.path.join(exports_dir, f"silpo_{ts}_{run_id[:8]}.xlsx")
-    latest_xlsx = os.path.join(exports_dir, "latest.xlsx")
-    wb.save(xlsx_path)
-    wb.save(latest_xlsx)
+    Each call adds one gzip member, so the cost is proportional to the new rows.
+    The high-water mark (products.id) and file size live in export_state; a
+    partial append left by a crash is truncated away before the next one. The
+    file is rebuilt from scratch (from the rows still in the hot DB) when
+    HISTORY_SCHEMA_VERSION changes or the file is missing or shorter than
+    recorded. Rows of runs still in progress stay for a later call; `run_id`
+    is the caller's own run, already fully written. With `writer` the state is
+    saved through the single DB writer (flush it before relying on it).
+    """
+    os.makedirs(exports_dir, exist_ok=True)
+    path = os.path.join(exports_dir, name)
+    state = conn.execute(
+        "SELECT schema_version, last_product_id, file_bytes FROM export_state WHERE name=?", (name,)
+    ).fetchone()
 
-    # CSV (products only)
-    csv_path = os.path.join(exports_dir, f"silpo_{ts}_{run_id[:8]}.csv")
-    latest_csv = os.path.join(exports_dir, "latest.csv")
-    with open(csv_path, "w", encoding="utf-8", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(prod_header)
-        for r in products:
-            w.writerow(list(r))
-    with open(latest_csv, "w", encoding="utf-8", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(prod_header)
-        for r in products:
-            w.writerow(list(r))
+    rebuild = (
+        state is None or state[0] != HISTORY_SCHEMA_VERSION or not os.path.exists(path)
+        or os.path.getsize(path) < state[2]  # lost its tail: truncate() would pad with NULs
+    )
+    if rebuild:
+        last_id = 0
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(HISTORY_HEADER)
+    else:
+        last_id, size = state[1], state[2]
+        if os.path.getsize(path) > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
 
-    # Hard guarantees (if these fail — run must be red)
-    for p in (xlsx_path, latest_xlsx, csv_path, latest_csv):
-        if not os.path.exists(p):
-            raise RuntimeError(f"Export file not created: {p}")
+    high_id = _history_high_water(conn, last_id, run_id)
+    n = 0
+    if high_id > last_id:
+        cur = conn.execute(
+            f"SELECT run_id, {', '.join(PRODUCT_HEADER)} FROM products WHERE id > ? AND id <= ? ORDER BY id",
+            (last_id, high_id),
+        )
+        with gzip.open(path, "at", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            for r in cur:
+                w.writerow(r)
+                n += 1
+        last_id = high_id
 
-    return latest_xlsx, latest_csv
+    state_args = (name, HISTORY_SCHEMA_VERSION, last_id, os.path.getsize(path), datetime.now(timezone.utc).isoformat())
+    if writer is not None:
+        writer.call("save_export_state", *state_args)
+    else:
+        db.save_export_state(conn, *state_args)
+    return path, n
@@ -1,4 +1,7 @@
+import json
 import re
+from typing import Optional
+
 from .model import Pack
 
 def to_float(x):
@@ -80,3 +83,20 @@ def compute_price_per_unit(price: float, pack: Pack):
             return None
         return round(price / base, 2)
     return None
+
+_TITLE_PUNCT_RE = re.compile(r"[«»\"'“”„`’ʼ(),.;:!?/\\-]+")
+_SPACE_RE = re.compile(r"\s+")
+
+def normalize_title(title: str) -> str:
+    """Lowercase, drop quotes/punctuation and collapse spaces (for matching, not display)"""
+    t = _TITLE_PUNCT_RE.sub(" ", (title or "").lower().replace("ё", "е"))
+    return _SPACE_RE.sub(" ", t).strip()
+
+def dom_text(raw_json: Optional[str]) -> str:
+    """Whole card text of a DOM-fallback row (kept in raw_json as {"text": ...}), or "" """
+    if not raw_json:
+        return ""
+    try:
+        return json.loads(raw_json).get("text") or ""
+    except (ValueError, AttributeError):
+        return ""
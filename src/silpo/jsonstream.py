@@ -0,0 +1,117 @@
+import codecs
+import json
+import re
+from typing import Iterable, Iterator, List, Sequence, Union
+
+# Incremental JSON reader for product API responses.
+#
+# The document is scanned structurally (brackets, keys, string boundaries) and
+# only the elements of arrays stored under PRODUCT_ARRAY_KEYS are decoded, one
+# at a time, with the C decoder. Nothing else is materialized, so memory is
+# bounded by the chunk size plus the largest single element, whatever the page
+# size. Both API formats keep their products in such an array:
+#   GetCategoryProducts  {"total": N, "items": [...]}
+#   EcomCatalogGlobal    {"meta": {...}, "data": {"items": [...]}}
+
+PRODUCT_ARRAY_KEYS = ("items", "products")
+CHUNK_SIZE = 64 * 1024
+
+_TOKEN_RE = re.compile(r'[{}\[\]",:]')
+_STRING_REST_RE = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+_decoder = json.JSONDecoder()
+
+def iter_chunks(body: Union[bytes, memoryview], size: int = CHUNK_SIZE) -> Iterator[memoryview]:
+    """Slices of an in-memory body (no copies)."""
+    view = memoryview(body)
+    for i in range(0, len(view), size):
+        yield view[i:i + size]
+
+def iter_array_elements(
+    chunks: Iterable[Union[bytes, memoryview]],
+    keys: Sequence[str] = PRODUCT_ARRAY_KEYS,
+) -> Iterator[object]:
+    """
+    Yield every object/array element of arrays stored under `keys` (at any
+    depth), decoded one at a time from a stream of UTF-8 chunks; scalar
+    elements are skipped. Raises ValueError on malformed or truncated input.
+    """
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+    it = iter(chunks)
+    buf = ""
+    pos = 0
+    eof = False
+    # per open container: "o" object / "a" array / "p" product array
+    stack: List[str] = []
+    expect_key = False
+    last_key = None
+
+    def more() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        buf = buf[pos:]  # drop everything already consumed
+        pos = 0
+        for chunk in it:
+            text = decode(bytes(chunk))
+            if text:
+                buf += text
+                return True
+        buf += decode(b"", True)
+        eof = True
+        return False
+
+    while True:
+        m = _TOKEN_RE.search(buf, pos)
+        if m is None:
+            pos = len(buf)  # only whitespace / numbers / literals left: not needed
+            if not more():
+                break
+            continue
+        c, i = m.group(), m.start()
+
+        if c == '"':
+            s = _STRING_REST_RE.match(buf, i + 1)
+            while s is None:
+                pos = i
+                if not more():
+                    raise ValueError("truncated JSON string")
+                i = 0
+                s = _STRING_REST_RE.match(buf, 1)
+            if stack and stack[-1] == "o" and expect_key:
+                last_key = json.loads(buf[i:s.end()])
+            pos = s.end()
+        elif c in "{[" and stack and stack[-1] == "p":
+            while True:
+                try:
+                    obj, end = _decoder.raw_decode(buf, i)
+                    break
+                except json.JSONDecodeError:
+                    pos = i
+                    if not more():
+                        raise ValueError("truncated or malformed array element") from None
+                    i = 0
+            pos = end
+            yield obj
+        elif c == "{":
+            stack.append("o")
+            expect_key = True
+            pos = i + 1
+        elif c == "[":
+            in_key = bool(stack) and stack[-1] == "o" and last_key in keys
+            stack.append("p" if in_key else "a")
+            pos = i + 1
+        elif c in "}]":
+            if not stack:
+                raise ValueError("unbalanced JSON")
+            stack.pop()
+            expect_key = False
+            pos = i + 1
+        elif c == ":":
+            expect_key = False
+            pos = i + 1
+        else:  # ","
+            expect_key = bool(stack) and stack[-1] == "o"
+            pos = i + 1
+
+    if stack:
+        raise ValueError("truncated JSON document")
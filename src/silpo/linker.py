@@ -0,0 +1,152 @@
+import math
+import re
+import sqlite3
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from .extractors import dom_text, extract_brand, extract_pack, normalize_title
+from .model import ProductBatch
+
+# Links DOM-fallback rows (no product_id/url) to known products.
+#
+# Known products are indexed by normalized title token (inverted index), so a
+# DOM title is only compared with products sharing at least one informative
+# token instead of the whole catalogue. Candidates are scored by IDF-weighted
+# token Jaccard, adjusted by brand and pack (qty + unit from extractors):
+# a different pack size means a different SKU.
+#
+# A DOM row's title is only the first line of its card, often the price, so
+# DOM rows are matched on the whole card text (the same text dedup.py keys them
+# by) with the price amounts taken out.
+
+class _Known:
+    __slots__ = ("product_id", "product_url", "tokens", "brand", "pack")
+
+    def __init__(self, product_id, product_url, tokens, brand, pack):
+        self.product_id = product_id
+        self.product_url = product_url
+        self.tokens = tokens
+        self.brand = brand
+        self.pack = pack
+
+_NUM_UNIT_RE = re.compile(r"(\d)(?=[^\d\s%])")
+_PRICE_RE = re.compile(r"\d+(?:[.,]\d+)?\s*грн\.?", re.IGNORECASE)
+
+def _tokens(title: str) -> Set[str]:
+    # "900мл" and "900 мл" must produce the same tokens
+    return set(_NUM_UNIT_RE.sub(r"\1 ", normalize_title(title)).split())
+
+def _brand(title: str) -> Optional[str]:
+    # only the «Brand» form; extract_brand's first-word fallback is too noisy to penalize on
+    return normalize_title(extract_brand(title)) or None if "«" in title else None
+
+def _pack(title: str) -> Optional[Tuple[float, str]]:
+    p = extract_pack(title)
+    return (p.qty, p.unit) if p.qty else None
+
+class ProductLinker:
+    def __init__(self, min_score: float = 0.6, common_df_ratio: float = 0.2, max_candidates: int = 200):
+        self.min_score = min_score
+        self.common_df_ratio = common_df_ratio
+        self.max_candidates = max_candidates
+        self._docs: List[_Known] = []
+        self._by_id: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @classmethod
+    def from_db(cls, conn: sqlite3.Connection, **kw) -> "ProductLinker":
+        """Index every product in latest_prices."""
+        linker = cls(**kw)
+        for pid, title, brand in conn.execute("SELECT product_id, title, brand FROM latest_prices"):
+            linker.add(pid, title, brand)
+        return linker
+
+    def add(self, product_id: str, title: Optional[str], brand: Optional[str] = None, product_url: Optional[str] = None) -> None:
+        if not product_id or not title:
+            return
+        i = self._by_id.get(product_id)
+        if i is not None:
+            if product_url and not self._docs[i].product_url:
+                self._docs[i].product_url = product_url
+            return
+        tokens = _tokens(title)
+        if not tokens:
+            return
+        i = len(self._docs)
+        brand = normalize_title(brand) or None if brand else _brand(title)
+        self._docs.append(_Known(product_id, product_url, tokens, brand, _pack(title)))
+        self._by_id[product_id] = i
+        for t in tokens:
+            self._postings[t].append(i)
+
+    def add_batch(self, batch: ProductBatch) -> None:
+        """Index rows that carry a product_id (API rows of the current run)."""
+        for pid, title, brand, url in zip(batch.product_id, batch.title, batch.brand, batch.product_url):
+            if pid:
+                self.add(pid, title, brand, url)
+
+    def _idf(self, token: str) -> float:
+        return math.log(1.0 + len(self._docs) / (1 + len(self._postings.get(token, ()))))
+
+    def match(self, title: str) -> Optional[Tuple[str, Optional[str], float]]:
+        """Best (product_id, product_url, score) for a title, or None below min_score."""
+        q = _tokens(title)
+        if not q or not self._docs:
+            return None
+
+        # blocking: candidates share an informative (not too common) token
+        common = max(20, int(len(self._docs) * self.common_df_ratio))
+        keys = [t for t in q if 0 < len(self._postings.get(t, ())) <= common]
+        if not keys:
+            keys = [t for t in q if t in self._postings]
+        keys.sort(key=lambda t: len(self._postings[t]))
+        cand: Set[int] = set()
+        for t in keys:
+            cand.update(self._postings[t])
+            if len(cand) >= self.max_candidates:
+                break
+        if not cand:
+            return None
+
+        idf = {t: self._idf(t) for t in q}
+        q_weight = sum(idf.values())
+        q_brand = _brand(title)
+        q_pack = _pack(title)
+
+        best, best_score = None, 0.0
+        for i in cand:
+            d = self._docs[i]
+            inter = sum(idf[t] for t in q & d.tokens)
+            union = q_weight + sum(self._idf(t) for t in d.tokens - q)
+            score = inter / union if union else 0.0
+            if q_brand and d.brand:
+                score += 0.1 if q_brand == d.brand else -0.1
+            if q_pack and d.pack:
+                score = score + 0.1 if q_pack == d.pack else score * 0.5
+            if score > best_score:
+                best, best_score = d, score
+        if best is None or best_score < self.min_score:
+            return None
+        return best.product_id, best.product_url, round(min(best_score, 1.0), 4)
+
+    def link(self, batch: ProductBatch) -> int:
+        """Fill product_id/product_url/link_score of unlinked rows in place; returns rows linked."""
+        n = 0
+        for i, (pid, title, source) in enumerate(zip(batch.product_id, batch.title, batch.source)):
+            if pid:
+                continue
+            if source == "dom":
+                title = _PRICE_RE.sub(" ", dom_text(batch.raw_json[i])).strip() or title
+            if not title:
+                continue
+            m = self.match(title)
+            if m is None:
+                continue
+            batch.product_id[i], url, batch.link_score[i] = m
+            if url and not batch.product_url[i]:
+                batch.product_url[i] = url
+            n += 1
+        return n
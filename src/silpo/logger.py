@@ -1,19 +1,21 @@
-import json, os
 from datetime import datetime, timezone
+from .logutil import BufferedJsonlWriter
 
 class JsonlLogger:
-    """Writes one JSON per line so CI logs are machine-readable."""
+    """Writes one JSON per line so CI logs are machine-readable (buffered, see BufferedJsonlWriter)."""
     def __init__(self, path: str):
-        os.makedirs(os.path.dirname(path), exist_ok=True)
         self.path = path
+        self._out = BufferedJsonlWriter(path)
 
     def _ts(self) -> str:
         return datetime.now(timezone.utc).isoformat()
 
     def log(self, level: str, step: str, **fields):
         rec = {"ts": self._ts(), "level": level, "step": step, **fields}
-        with open(self.path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._out.write(rec, sync=(level == "ERROR"))
+
+    def flush(self): self._out.flush()
+    def close(self): self._out.close()
 
     def info(self, step: str, **fields): self.log("INFO", step, **fields)
     def warn(self, step: str, **fields): self.log("WARN", step, **fields)
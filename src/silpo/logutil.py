@@ -1,27 +1,144 @@
+import atexit
 import json
 import os
+import queue
+import threading
+import time
 from datetime import datetime, timezone
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from .model import LogEvent
 
 def utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
+class BufferedJsonlWriter:
+    """
+    Appends JSON lines from a background thread, one write() per batch.
+
+    Crash-safety contract (tests/test_logutil.py):
+      * a record is handed to the OS once flush()/close() returns, or at most
+        `flush_interval` seconds / `max_batch` records after write();
+      * write(..., sync=True) returns only after the record is handed to the OS
+        (RunLogger uses it for ERROR events, so the cause of a crash is never lost);
+      * close() runs at interpreter exit, so a normal exit or an unhandled
+        exception loses nothing; a hard kill (SIGKILL, OOM) drops the records
+        written since the last flush, never the ones before it;
+      * a record json.dumps() cannot serialize raises in write(), at the call
+        site, and never reaches (or spoils) a batch.
+    "Handed to the OS" means file.flush(), not os.fsync(): flushed records
+    survive the process dying, not a kernel crash or power loss.
+    """
+    def __init__(
+        self,
+        path: str,
+        max_batch: int = 256,
+        flush_interval: float = 1.0,
+        on_batch: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+    ):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.errors = 0
+        self._on_batch = on_batch
+        self._f = open(path, "a", encoding="utf-8")  # fails early if not writable
+        self._q: "queue.Queue[Any]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="silpo-jsonl", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, rec: Dict[str, Any], sync: bool = False) -> None:
+        if self._closed:
+            raise ValueError(f"write to closed log {self.path}")
+        line = json.dumps(rec, ensure_ascii=False) + "\n"  # on the caller's thread: errors raise here
+        self._q.put((line, rec))
+        if sync:
+            self.flush()
+
+    def flush(self) -> None:
+        """Block until every record written so far reached the OS (file.flush, no fsync)."""
+        if self._closed:
+            return
+        done = threading.Event()
+        self._q.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(None)
+        self._thread.join()
+        self._f.close()
+        atexit.unregister(self.close)
+
+    def _drain(self, buf: List[Tuple[str, Dict[str, Any]]]) -> None:
+        if not buf:
+            return
+        try:
+            self._f.write("".join(line for line, _ in buf))
+            self._f.flush()
+        except Exception:
+            self.errors += 1
+        if self._on_batch is not None:
+            try:
+                self._on_batch([rec for _, rec in buf])
+            except Exception:
+                self.errors += 1
+
+    def _run(self) -> None:
+        buf: List[Tuple[str, Dict[str, Any]]] = []
+        deadline: Optional[float] = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                item = False  # interval elapsed
+            if isinstance(item, tuple):
+                buf.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(buf) < self.max_batch:
+                    continue
+            self._drain(buf)
+            buf, deadline = [], None
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                return
+
 class RunLogger:
-    def __init__(self, jsonl_path: str):
+    """
+    Run log: buffered JSONL file plus an optional event sink.
+
+    With `event_sink` (e.g. DbWriter.put_events) events are streamed to it in
+    batches and not kept in memory; without it they are collected in .events.
+    """
+    def __init__(
+        self,
+        jsonl_path: str,
+        event_sink: Optional[Callable[[List[LogEvent]], Any]] = None,
+        max_batch: int = 256,
+        flush_interval: float = 1.0,
+    ):
         self.jsonl_path = jsonl_path
-        os.makedirs(os.path.dirname(jsonl_path), exist_ok=True)
         self.events: List[LogEvent] = []
-
-        # Ensure writable early
-        with open(self.jsonl_path, "a", encoding="utf-8") as f:
-            f.write("")
+        self._keep = event_sink is None
+        on_batch = None
+        if event_sink is not None:
+            on_batch = lambda recs: event_sink([LogEvent(**r) for r in recs])
+        self._out = BufferedJsonlWriter(jsonl_path, max_batch, flush_interval, on_batch)
 
     def _write(self, level: str, event: str, message: str):
         rec = {"ts": utc_iso(), "level": level, "event": event, "message": message}
-        with open(self.jsonl_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
-        self.events.append(LogEvent(**rec))
+        if self._keep:
+            self.events.append(LogEvent(**rec))
+        self._out.write(rec, sync=(level == "ERROR"))
+
+    def flush(self): self._out.flush()
+    def close(self): self._out.close()
 
     def info(self, event: str, message: str): self._write("INFO", event, message)
     def warn(self, event: str, message: str): self._write("WARN", event, message)
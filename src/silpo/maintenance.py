@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from .config import settings
+from .db import connect, init
+from .logger import JsonlLogger
+
+# Cold data lives in one SQLite file per month: <archive_dir>/silpo_YYYY-MM.sqlite.
+# The hot DB keeps runs, latest_prices and the price_daily/price_weekly roll-ups,
+# so dashboards and query.py never have to touch the archives.
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS arc.products AS SELECT * FROM main.products WHERE 0;
+CREATE TABLE IF NOT EXISTS arc.page_logs AS SELECT * FROM main.page_logs WHERE 0;
+CREATE TABLE IF NOT EXISTS arc.events AS SELECT * FROM main.events WHERE 0;
+CREATE TABLE IF NOT EXISTS arc.raw_json (
+  id INTEGER PRIMARY KEY,
+  run_id TEXT NOT NULL,
+  raw_json TEXT
+);
+"""
+ARCHIVED_TABLES = ("products", "page_logs", "events")
+
+# ISO 8601 week of a YYYY-MM-DD column: the week belongs to the year of its
+# Thursday, so the days around New Year share one bucket (strftime's %W
+# would split them into "YYYY-W52" and "YYYY+1-W00").
+def _iso_week_sql(col: str) -> str:
+    thu = f"date({col}, '-3 days', 'weekday 4')"
+    return f"strftime('%Y', {thu}) || '-W' || printf('%02d', (CAST(strftime('%j', {thu}) AS INTEGER) - 1) / 7 + 1)"
+
+def _week_start_sql(col: str) -> str:
+    return f"date({col}, '-6 days', 'weekday 1')"
+
+def _cutoff(days: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+def archive_path(archive_dir: str, month: str) -> str:
+    return os.path.join(archive_dir, f"silpo_{month}.sqlite")
+
+def _attach(conn: sqlite3.Connection, archive_dir: str, month: str) -> None:
+    os.makedirs(archive_dir, exist_ok=True)
+    conn.commit()
+    conn.execute("ATTACH DATABASE ? AS arc", (archive_path(archive_dir, month),))
+    conn.executescript(ARCHIVE_SCHEMA)
+    for table in ARCHIVED_TABLES:
+        # archives created before a db.MIGRATIONS column was added
+        have = {r[1] for r in conn.execute(f"PRAGMA arc.table_info({table})")}
+        for r in conn.execute(f"PRAGMA main.table_info({table})").fetchall():
+            if r[1] not in have:
+                conn.execute(f"ALTER TABLE arc.{table} ADD COLUMN {r[1]} {r[2]}")
+        # rows are keyed by their hot-DB id, so a move retried after a crash
+        # (INSERT OR IGNORE) never duplicates them; older archives are deduped once
+        index = f"ux_{table}_id"
+        if conn.execute("SELECT 1 FROM arc.sqlite_master WHERE type='index' AND name=?", (index,)).fetchone() is None:
+            conn.execute(f"DELETE FROM arc.{table} WHERE rowid NOT IN (SELECT MIN(rowid) FROM arc.{table} GROUP BY id)")
+            conn.execute(f"CREATE UNIQUE INDEX arc.{index} ON {table}(id)")
+    conn.commit()
+
+def _detach(conn: sqlite3.Connection) -> None:
+    conn.commit()
+    conn.execute("DETACH DATABASE arc")
+
+def _months(conn: sqlite3.Connection, sql: str, params: tuple) -> List[str]:
+    return [r[0] for r in conn.execute(sql, params).fetchall() if r[0]]
+
+def rollup(conn: sqlite3.Connection) -> int:
+    """(Re)compute daily and weekly price summaries from the last rolled-up day onwards"""
+    last = conn.execute("SELECT MAX(day) FROM price_daily").fetchone()[0] or ""
+    cur = conn.execute(
+        """
+        INSERT OR REPLACE INTO price_daily(product_id, day, title, price_min, price_max, price_avg, price_old_max, n_obs)
+        SELECT product_id, substr(upload_ts, 1, 10), MAX(title),
+               MIN(price_current), MAX(price_current), ROUND(AVG(price_current), 2), MAX(price_old), COUNT(*)
+        FROM products
+        WHERE upload_ts >= ? AND product_id IS NOT NULL AND price_current IS NOT NULL
+        GROUP BY product_id, substr(upload_ts, 1, 10)
+        """,
+        (last,),
+    )
+    n = cur.rowcount
+    if conn.execute("SELECT 1 FROM price_weekly WHERE week_start IS NULL LIMIT 1").fetchone():
+        # buckets written before ISO weeks (strftime %W keys): rebuild them all
+        conn.execute("DELETE FROM price_weekly")
+        last = ""
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO price_weekly(product_id, week, week_start, title, price_min, price_max, price_avg, price_old_max, n_obs)
+        SELECT product_id, {_iso_week_sql("day")}, {_week_start_sql("day")}, MAX(title),
+               MIN(price_min), MAX(price_max), ROUND(SUM(price_avg * n_obs) / SUM(n_obs), 2), MAX(price_old_max), SUM(n_obs)
+        FROM price_daily
+        WHERE day >= COALESCE({_week_start_sql("?")}, '')
+        GROUP BY product_id, {_week_start_sql("day")}
+        """,
+        (last,),
+    )
+    conn.commit()
+    return n
+
+def prune_raw_json(conn: sqlite3.Connection, cutoff: str, archive_dir: Optional[str]) -> int:
+    """Drop products.raw_json older than cutoff, optionally copying it into the month archive first"""
+    where = "upload_ts < ? AND raw_json IS NOT NULL"
+    if archive_dir:
+        for month in _months(conn, f"SELECT DISTINCT substr(upload_ts, 1, 7) FROM products WHERE {where}", (cutoff,)):
+            _attach(conn, archive_dir, month)
+            conn.execute(
+                f"INSERT OR IGNORE INTO arc.raw_json(id, run_id, raw_json) "
+                f"SELECT id, run_id, raw_json FROM main.products WHERE {where} AND substr(upload_ts, 1, 7)=?",
+                (cutoff, month),
+            )
+            _detach(conn)
+    n = conn.execute(f"UPDATE products SET raw_json=NULL WHERE {where}", (cutoff,)).rowcount
+    conn.commit()
+    return n
+
+def prune_events(conn: sqlite3.Connection, cutoff: str, archive_dir: Optional[str]) -> int:
+    """Delete events older than cutoff, optionally copying them into the month archive first"""
+    if archive_dir:
+        for month in _months(conn, "SELECT DISTINCT substr(ts, 1, 7) FROM events WHERE ts < ?", (cutoff,)):
+            _attach(conn, archive_dir, month)
+            conn.execute(
+                "INSERT OR IGNORE INTO arc.events SELECT * FROM main.events WHERE ts < ? AND substr(ts, 1, 7)=?",
+                (cutoff, month),
+            )
+            _detach(conn)
+    n = conn.execute("DELETE FROM events WHERE ts < ?", (cutoff,)).rowcount
+    conn.commit()
+    return n
+
+def archive_months(conn: sqlite3.Connection, cutoff: str, archive_dir: str) -> Dict[str, int]:
+    """Move products/page_logs of whole months before cutoff into per-month archive files"""
+    # never move rows that have not been rolled up yet
+    rolled = conn.execute("SELECT MAX(day) FROM price_daily").fetchone()[0] or ""
+    limit_month = min(cutoff[:7], rolled[:7])
+    moved: Dict[str, int] = {}
+    months = _months(
+        conn,
+        "SELECT DISTINCT substr(upload_ts, 1, 7) FROM products WHERE upload_ts < ? "
+        "UNION SELECT DISTINCT substr(upload_ts, 1, 7) FROM page_logs WHERE upload_ts < ?",
+        (limit_month, limit_month),
+    )
+    for month in months:
+        _attach(conn, archive_dir, month)
+        n = 0
+        # copy + delete in one transaction; INSERT OR IGNORE keeps a retry idempotent
+        # should the archive commit and the hot DB not (WAL is atomic per file only)
+        with conn:
+            for table in ("products", "page_logs"):
+                conn.execute(
+                    f"INSERT OR IGNORE INTO arc.{table} SELECT * FROM main.{table} WHERE substr(upload_ts, 1, 7)=?",
+                    (month,),
+                )
+                n += conn.execute(f"DELETE FROM main.{table} WHERE substr(upload_ts, 1, 7)=?", (month,)).rowcount
+            conn.execute("INSERT OR IGNORE INTO arc.events SELECT * FROM main.events WHERE substr(ts, 1, 7)=?", (month,))
+            conn.execute("DELETE FROM main.events WHERE substr(ts, 1, 7)=?", (month,))
+        _detach(conn)
+        moved[month] = n
+    return moved
+
+def reclaim_space(conn: sqlite3.Connection, allow_full_vacuum: bool = False) -> str:
+    """Incremental vacuum + WAL truncate; a full VACUUM only to switch an old DB to auto_vacuum=INCREMENTAL"""
+    conn.commit()
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode != 2:
+        if not allow_full_vacuum:
+            return "auto_vacuum not INCREMENTAL (run once with --convert-vacuum)"
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        note = "converted"
+    else:
+        conn.executescript("PRAGMA incremental_vacuum;")  # execute() steps it once: a single page
+        note = "incremental"
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return note
+
+def maintain(
+    conn: sqlite3.Connection,
+    raw_json_days: int = settings.raw_json_retention_days,
+    events_days: int = settings.events_retention_days,
+    archive_after_days: int = settings.archive_after_days,
+    archive_dir: Optional[str] = settings.archive_dir,
+    allow_full_vacuum: bool = False,
+) -> Dict[str, object]:
+    summary: Dict[str, object] = {}
+    summary["rolled_up"] = rollup(conn)
+    summary["raw_json_dropped"] = prune_raw_json(conn, _cutoff(raw_json_days), archive_dir)
+    summary["events_dropped"] = prune_events(conn, _cutoff(events_days), archive_dir)
+    if archive_dir and archive_after_days > 0:
+        summary["archived"] = archive_months(conn, _cutoff(archive_after_days), archive_dir)
+    summary["vacuum"] = reclaim_space(conn, allow_full_vacuum)
+    return summary
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Roll up, prune and compact the Silpo SQLite history")
+    ap.add_argument("--db", default=settings.db_path)
+    ap.add_argument("--raw-json-days", type=int, default=settings.raw_json_retention_days)
+    ap.add_argument("--events-days", type=int, default=settings.events_retention_days)
+    ap.add_argument("--archive-after-days", type=int, default=settings.archive_after_days)
+    ap.add_argument("--archive-dir", default=settings.archive_dir, help="empty string = drop instead of archive")
+    ap.add_argument("--convert-vacuum", action="store_true", help="one-time full VACUUM to enable incremental vacuum")
+    args = ap.parse_args(argv)
+
+    logger = JsonlLogger(os.path.join(settings.logs_dir, "maintenance.jsonl"))
+    conn = connect(args.db)
+    try:
+        init(conn)
+        summary = maintain(
+            conn,
+            raw_json_days=args.raw_json_days,
+            events_days=args.events_days,
+            archive_after_days=args.archive_after_days,
+            archive_dir=args.archive_dir or None,
+            allow_full_vacuum=args.convert_vacuum,
+        )
+        logger.info("maintenance_done", **summary)
+        print(json.dumps(summary, ensure_ascii=False))
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
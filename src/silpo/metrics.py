@@ -0,0 +1,108 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# Timing spans of one run. Each span is one row of the run_metrics table:
+#   (run_id, seq, phase, page_number, started_at, duration_ms, items)
+# page_number is NULL for run-level phases (browser_launch, export_*, db_*),
+# so per-page latency is simply `WHERE phase='page'`.
+# Kept free of silpo imports: query.py (and so the CLI read path) uses it.
+
+def _utc_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100) of unsorted values."""
+    if not values:
+        return None
+    s = sorted(values)
+    k = max(0, min(len(s) - 1, math.ceil(q / 100.0 * len(s)) - 1))
+    return s[k]
+
+def summarize(durations: Dict[str, List[float]]) -> Dict[str, Dict[str, Any]]:
+    """phase -> count / total / p50 / p95 / max (ms)."""
+    return {
+        phase: {
+            "count": len(ms),
+            "total_ms": round(sum(ms), 3),
+            "p50_ms": round(percentile(ms, 50), 3),
+            "p95_ms": round(percentile(ms, 95), 3),
+            "max_ms": round(max(ms), 3),
+        }
+        for phase, ms in durations.items() if ms
+    }
+
+class RunMetrics:
+    """Collects timing spans of one run (thread-safe)."""
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self._rows: List[tuple] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, phase: str, page: Optional[int] = None, items: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Time a block; set span["items"] inside it to record a count."""
+        info: Dict[str, Any] = {"items": items}
+        started = _utc_iso()
+        t0 = time.perf_counter()
+        try:
+            yield info
+        finally:
+            self.record(phase, (time.perf_counter() - t0) * 1000.0, page, info["items"], started)
+
+    def record(
+        self,
+        phase: str,
+        duration_ms: float,
+        page: Optional[int] = None,
+        items: Optional[int] = None,
+        started_at: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self._rows.append((
+                self.run_id, len(self._rows) + 1, phase, page,
+                started_at or _utc_iso(), round(duration_ms, 3), items,
+            ))
+
+    def db_values(self) -> List[tuple]:
+        with self._lock:
+            return list(self._rows)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        durations: Dict[str, List[float]] = {}
+        for r in self.db_values():
+            durations.setdefault(r[2], []).append(r[5])
+        return summarize(durations)
+
+def _label(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def prometheus_text(summary: Dict[str, Dict[str, Any]], gauges: Dict[str, float]) -> str:
+    """Prometheus exposition text: a phase duration summary plus silpo_run_* gauges."""
+    lines = [
+        "# HELP silpo_phase_duration_seconds Duration of scraper run phases (last run).",
+        "# TYPE silpo_phase_duration_seconds summary",
+    ]
+    for phase, s in sorted(summary.items()):
+        p = _label(phase)
+        lines.append(f'silpo_phase_duration_seconds{{phase="{p}",quantile="0.5"}} {s["p50_ms"] / 1000.0:.6f}')
+        lines.append(f'silpo_phase_duration_seconds{{phase="{p}",quantile="0.95"}} {s["p95_ms"] / 1000.0:.6f}')
+        lines.append(f'silpo_phase_duration_seconds_sum{{phase="{p}"}} {s["total_ms"] / 1000.0:.6f}')
+        lines.append(f'silpo_phase_duration_seconds_count{{phase="{p}"}} {s["count"]}')
+    for name, value in sorted(gauges.items()):
+        lines.append(f"# TYPE silpo_run_{name} gauge")
+        lines.append(f"silpo_run_{name} {float(value)!r}")
+    return "\n".join(lines) + "\n"
+
+def write_prometheus_textfile(path: str, summary: Dict[str, Dict[str, Any]], gauges: Dict[str, float]) -> str:
+    """Atomically replace a node_exporter textfile-collector file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text(summary, gauges))
+    os.replace(tmp, path)
+    return path
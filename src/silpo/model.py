@@ -1,5 +1,7 @@
+import math
+from array import array
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Union
 
 @dataclass
 class LogEvent:
@@ -8,7 +10,18 @@ class LogEvent:
     event: str
     message: str
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class Pack:
+    qty: Optional[float]
+    unit: str
+
+# Column order of product exports (CSV/XLSX); ProductRow.as_list() follows it
+HEADER = [
+    "upload_ts", "page_number", "page_url", "source", "product_id", "product_url", "title", "brand",
+    "pack_qty", "pack_unit", "price_current", "price_old", "discount_pct",
+]
+
+@dataclass(frozen=True, slots=True)
 class ProductRow:
     run_id: str
     upload_ts: str
@@ -25,6 +38,14 @@ class ProductRow:
     price_old: Optional[float]
     discount_pct: Optional[float]
     raw_json: Optional[str]
+    link_score: Optional[float] = None  # set when a DOM row was linked to a known product_id
+
+    def as_list(self) -> list:
+        return [
+            self.upload_ts, self.page_number, self.page_url, self.source, self.product_id, self.product_url,
+            self.title, self.brand, self.pack_qty, self.pack_unit, self.price_current, self.price_old,
+            self.discount_pct,
+        ]
 
 @dataclass
 class PageLogRow:
@@ -38,3 +59,166 @@ class PageLogRow:
     items_seen: int
     items_saved: int
     note: Optional[str]
+    items_dup: int = 0    # rows dropped as duplicates of already-seen products
+
+class _DictColumn:
+    """Dictionary-encoded string column (few distinct values, many rows)."""
+    __slots__ = ("codes", "values", "_index")
+
+    def __init__(self):
+        self.codes = array("I")
+        self.values: List[Optional[str]] = []
+        self._index: Dict[Optional[str], int] = {}
+
+    def append(self, v: Optional[str]) -> None:
+        code = self._index.get(v)
+        if code is None:
+            code = self._index[v] = len(self.values)
+            self.values.append(v)
+        self.codes.append(code)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        return self.values[self.codes[i]]
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        values = self.values
+        return (values[c] for c in self.codes)
+
+    def __getstate__(self):
+        return self.codes, self.values
+
+    def __setstate__(self, state):
+        self.codes, self.values = state
+        self._index = {v: i for i, v in enumerate(self.values)}
+
+def _num(v: Optional[float]) -> float:
+    return math.nan if v is None else float(v)
+
+def _opt(v: float) -> Optional[float]:
+    return None if v != v else v  # NaN -> None
+
+class ProductBatch:
+    """
+    Columnar batch of product rows that share run/page metadata.
+
+    Numeric columns are float arrays (NaN = missing), low-cardinality strings
+    are dictionary-encoded, run_id/upload_ts/page_number/page_url are stored
+    once per batch. Iterating yields ProductRow objects for compatibility;
+    db, writer and sinks read the columns directly (db_values/as_lists).
+    """
+    __slots__ = (
+        "run_id", "upload_ts", "page_number", "page_url",
+        "source", "brand", "pack_unit",
+        "product_id", "product_url", "title", "raw_json",
+        "pack_qty", "price_current", "price_old", "discount_pct", "link_score",
+    )
+
+    def __init__(self, run_id: str, upload_ts: str, page_number: int, page_url: str):
+        self.run_id = run_id
+        self.upload_ts = upload_ts
+        self.page_number = page_number
+        self.page_url = page_url
+        self.source = _DictColumn()
+        self.brand = _DictColumn()
+        self.pack_unit = _DictColumn()
+        self.product_id: List[Optional[str]] = []
+        self.product_url: List[Optional[str]] = []
+        self.title: List[Optional[str]] = []
+        self.raw_json: List[Optional[str]] = []
+        self.pack_qty = array("d")
+        self.price_current = array("d")
+        self.price_old = array("d")
+        self.discount_pct = array("d")
+        self.link_score = array("d")
+
+    def append(
+        self,
+        source: str,
+        product_id: Optional[str],
+        product_url: Optional[str],
+        title: Optional[str],
+        brand: Optional[str],
+        pack_qty: Optional[float],
+        pack_unit: Optional[str],
+        price_current: Optional[float],
+        price_old: Optional[float],
+        discount_pct: Optional[float],
+        raw_json: Optional[str],
+        link_score: Optional[float] = None,
+    ) -> None:
+        self.source.append(source)
+        self.product_id.append(product_id)
+        self.product_url.append(product_url)
+        self.title.append(title)
+        self.brand.append(brand)
+        self.pack_qty.append(_num(pack_qty))
+        self.pack_unit.append(pack_unit)
+        self.price_current.append(_num(price_current))
+        self.price_old.append(_num(price_old))
+        self.discount_pct.append(_num(discount_pct))
+        self.raw_json.append(raw_json)
+        self.link_score.append(_num(link_score))
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[ProductRow]) -> "ProductBatch":
+        """Rows must share run_id/upload_ts/page_number/page_url."""
+        first = rows[0]
+        b = cls(first.run_id, first.upload_ts, first.page_number, first.page_url)
+        for r in rows:
+            b.append(r.source, r.product_id, r.product_url, r.title, r.brand, r.pack_qty, r.pack_unit,
+                     r.price_current, r.price_old, r.discount_pct, r.raw_json, r.link_score)
+        return b
+
+    def __len__(self) -> int:
+        return len(self.title)
+
+    def take(self, indices: Sequence[int]) -> "ProductBatch":
+        """New batch with the given rows, in the given order."""
+        b = ProductBatch(self.run_id, self.upload_ts, self.page_number, self.page_url)
+        for name in ("source", "brand", "pack_unit"):
+            src, dst = getattr(self, name), getattr(b, name)
+            for i in indices:
+                dst.append(src[i])
+        for name in ("product_id", "product_url", "title", "raw_json", "pack_qty", "price_current", "price_old", "discount_pct", "link_score"):
+            src, dst = getattr(self, name), getattr(b, name)
+            dst.extend(src[i] for i in indices)
+        return b
+
+    def __getitem__(self, i: int) -> ProductRow:
+        return ProductRow(
+            self.run_id, self.upload_ts, self.page_number, self.page_url, self.source[i],
+            self.product_id[i], self.product_url[i], self.title[i], self.brand[i],
+            _opt(self.pack_qty[i]), self.pack_unit[i], _opt(self.price_current[i]),
+            _opt(self.price_old[i]), _opt(self.discount_pct[i]), self.raw_json[i], _opt(self.link_score[i]),
+        )
+
+    def __iter__(self) -> Iterator[ProductRow]:
+        return (self[i] for i in range(len(self)))
+
+    def db_values(self) -> Iterator[tuple]:
+        """Rows in db.PRODUCTS_INSERT column order."""
+        run_id, ts, pn, url = self.run_id, self.upload_ts, self.page_number, self.page_url
+        for src, pid, purl, title, brand, qty, unit, pc, po, disc, raw, link in zip(
+            self.source, self.product_id, self.product_url, self.title, self.brand, self.pack_qty,
+            self.pack_unit, self.price_current, self.price_old, self.discount_pct, self.raw_json,
+            self.link_score,
+        ):
+            yield (run_id, ts, pn, url, src, pid, purl, title, brand, _opt(qty), unit,
+                   _opt(pc), _opt(po), _opt(disc), raw, _opt(link))
+
+    def as_lists(self) -> Iterator[list]:
+        """Rows in HEADER order."""
+        ts, pn, url = self.upload_ts, self.page_number, self.page_url
+        for src, pid, purl, title, brand, qty, unit, pc, po, disc in zip(
+            self.source, self.product_id, self.product_url, self.title, self.brand, self.pack_qty,
+            self.pack_unit, self.price_current, self.price_old, self.discount_pct,
+        ):
+            yield [ts, pn, url, src, pid, purl, title, brand, _opt(qty), unit, _opt(pc), _opt(po), _opt(disc)]
+
+Rows = Union[Sequence[ProductRow], ProductBatch]
+
+def header_rows(rows: Rows) -> Iterator[list]:
+    """Rows in HEADER order from either representation."""
+    if isinstance(rows, ProductBatch):
+        return rows.as_lists()
+    return (r.as_list() for r in rows)
@@ -0,0 +1,214 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .metrics import percentile, summarize
+
+# Every query below is answered from an index (idx_products_pid_ts,
+# idx_products_run_pid, idx_latest_discount, idx_unit_prices_lookup) or a
+# summary table (latest_prices, unit_prices), so lookups stay cheap regardless
+# of how many runs are stored.
+
+def connect_readonly(db_path: str) -> sqlite3.Connection:
+    """Read-only connection (mode=ro): never creates the file or takes the write lock."""
+    uri = Path(db_path).resolve().as_uri()  # percent-encodes '?', '#', '%' and spaces in the path
+    return sqlite3.connect(f"{uri}?mode=ro", uri=True, check_same_thread=False)
+
+def _rows(cur: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    cols = [d[0] for d in cur.description]
+    return [dict(zip(cols, r)) for r in cur.fetchall()]
+
+def latest_price(conn: sqlite3.Connection, product_id: str) -> Optional[Dict[str, Any]]:
+    """Latest known price of one product"""
+    rows = _rows(conn.execute(
+        """
+        SELECT product_id, run_id, upload_ts, title, brand, pack_qty, pack_unit,
+               price_current, price_old, discount_pct
+        FROM latest_prices
+        WHERE product_id=?
+        """,
+        (product_id,),
+    ))
+    return rows[0] if rows else None
+
+def latest_prices(conn: sqlite3.Connection, limit: int = 1000, offset: int = 0) -> List[Dict[str, Any]]:
+    """Latest known price of every product"""
+    return _rows(conn.execute(
+        """
+        SELECT product_id, run_id, upload_ts, title, brand, pack_qty, pack_unit,
+               price_current, price_old, discount_pct
+        FROM latest_prices
+        ORDER BY product_id
+        LIMIT ? OFFSET ?
+        """,
+        (limit, offset),
+    ))
+
+def price_history(
+    conn: sqlite3.Connection,
+    product_id: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Price observations of one product, oldest first (one per upload_ts).
+    `since`/`until` are ISO timestamps or dates; a date `until` includes that whole day.
+    """
+    where = "product_id=?"
+    params: list = [product_id]
+    if since:
+        where += " AND upload_ts >= ?"
+        params.append(since)
+    if until:
+        where += " AND upload_ts < date(?, '+1 day')" if len(until) == 10 else " AND upload_ts <= ?"
+        params.append(until)
+    return _rows(conn.execute(
+        f"""
+        SELECT upload_ts, MIN(price_current) AS price_current,
+               MAX(price_old) AS price_old, MAX(discount_pct) AS discount_pct
+        FROM products
+        WHERE {where}
+        GROUP BY upload_ts
+        ORDER BY upload_ts
+        """,
+        params,
+    ))
+
+def price_changes(
+    conn: sqlite3.Connection, run_from: str, run_to: str, min_abs_change: float = 0.0
+) -> List[Dict[str, Any]]:
+    """Products whose price differs between two runs"""
+    return _rows(conn.execute(
+        """
+        WITH a AS (
+          SELECT product_id, MIN(price_current) AS price
+          FROM products WHERE run_id=? AND product_id IS NOT NULL
+          GROUP BY product_id
+        ), b AS (
+          SELECT product_id, MIN(price_current) AS price
+          FROM products WHERE run_id=? AND product_id IS NOT NULL
+          GROUP BY product_id
+        )
+        SELECT b.product_id, a.price AS price_from, b.price AS price_to,
+               ROUND(b.price - a.price, 2) AS change,
+               CASE WHEN a.price > 0 THEN ROUND((b.price - a.price) * 100.0 / a.price, 2) END AS change_pct
+        FROM b JOIN a ON a.product_id = b.product_id
+        WHERE a.price IS NOT NULL AND b.price IS NOT NULL
+          AND ABS(b.price - a.price) > ?
+        ORDER BY change_pct
+        """,
+        (run_from, run_to, min_abs_change),
+    ))
+
+def top_discounts(conn: sqlite3.Connection, limit: int = 20) -> List[Dict[str, Any]]:
+    """Largest current discounts (from latest_prices)"""
+    return _rows(conn.execute(
+        """
+        SELECT product_id, upload_ts, title, brand, price_current, price_old, discount_pct
+        FROM latest_prices
+        WHERE discount_pct > 0
+        ORDER BY discount_pct DESC
+        LIMIT ?
+        """,
+        (limit,),
+    ))
+
+def cheapest_per_unit(
+    conn: sqlite3.Connection,
+    product_type: str,
+    unit_basis: str = "l",
+    fat_pct: Optional[float] = None,
+    day: Optional[str] = None,
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    Cheapest products of a type by price per kg/l/piece on one day
+    (default: the latest day with data), e.g. ("молоко", "l", 2.5).
+    A product scraped by several runs that day appears once, at its latest price.
+    """
+    if day is None:
+        day = conn.execute("SELECT MAX(day) FROM unit_prices").fetchone()[0]
+        if day is None:
+            return []
+    where = "day=? AND product_type=? AND unit_basis=?"
+    params: list = [day, product_type, unit_basis]
+    if fat_pct is not None:
+        where += " AND fat_pct=?"
+        params.append(fat_pct)
+    sql = f"""
+        SELECT product_id, title, brand, fat_pct, price_current, price_per_unit, unit_basis, upload_ts
+        FROM (
+          SELECT *, ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY upload_ts DESC, run_id DESC) AS rn
+          FROM unit_prices
+          WHERE {where}
+        )
+        WHERE rn = 1
+        ORDER BY price_per_unit LIMIT ?
+    """
+    params.append(limit)
+    return _rows(conn.execute(sql, params))
+
+def ok_runs_version(conn: sqlite3.Connection) -> Tuple[int, Optional[str]]:
+    """(number of OK runs, last OK finished_at): changes exactly when a run switches to OK"""
+    n, last = conn.execute("SELECT COUNT(*), MAX(finished_at) FROM runs WHERE status='OK'").fetchone()
+    return n, last
+
+def latest_ok_runs_by_category(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """Latest OK run of every category_url"""
+    return _rows(conn.execute(
+        """
+        SELECT r.category_url, r.run_id, r.started_at, r.finished_at
+        FROM runs r
+        WHERE r.status='OK' AND r.finished_at = (
+          SELECT MAX(finished_at) FROM runs WHERE status='OK' AND category_url=r.category_url
+        )
+        ORDER BY r.category_url
+        """
+    ))
+
+def run_products(conn: sqlite3.Connection, run_id: str) -> sqlite3.Cursor:
+    """Cursor over the products of one run (category snapshot), page order"""
+    return conn.execute(
+        """
+        SELECT product_id, upload_ts, page_number, title, brand, pack_qty, pack_unit,
+               price_current, price_old, discount_pct, product_url
+        FROM products
+        WHERE run_id=?
+        ORDER BY page_number, id
+        """,
+        (run_id,),
+    )
+
+def run_metrics(conn: sqlite3.Connection, run_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Per-phase count / total / p50 / p95 / max of one run (default: the latest run)"""
+    if run_id is None:
+        row = conn.execute("SELECT run_id FROM runs ORDER BY started_at DESC LIMIT 1").fetchone()
+        if row is None:
+            return {}
+        run_id = row[0]
+    durations: Dict[str, List[float]] = {}
+    for phase, ms in conn.execute("SELECT phase, duration_ms FROM run_metrics WHERE run_id=? ORDER BY seq", (run_id,)):
+        durations.setdefault(phase, []).append(ms)
+    return summarize(durations)
+
+def phase_latency(conn: sqlite3.Connection, phase: str = "page", runs: int = 20) -> List[Dict[str, Any]]:
+    """p50/p95 of one phase for each of the last `runs` runs, newest first (regression tracking)"""
+    out = []
+    # one pass over idx_run_metrics_phase; percentiles need the values, so they come back as a JSON array
+    for run_id, started_at, status, count, max_ms, values in conn.execute(
+        """
+        SELECT r.run_id, r.started_at, r.status, COUNT(*), MAX(m.duration_ms), json_group_array(m.duration_ms)
+        FROM (SELECT run_id, started_at, status FROM runs ORDER BY started_at DESC LIMIT ?) r
+        JOIN run_metrics m ON m.phase = ? AND m.run_id = r.run_id
+        GROUP BY r.run_id
+        ORDER BY r.started_at DESC
+        """,
+        (runs, phase),
+    ):
+        ms = json.loads(values)
+        out.append({
+            "run_id": run_id, "started_at": started_at, "status": status, "phase": phase,
+            "count": count, "p50_ms": percentile(ms, 50), "p95_ms": percentile(ms, 95), "max_ms": max_ms,
+        })
+    return out
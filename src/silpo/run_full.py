@@ -1,13 +1,18 @@
 import os
+import time
 import uuid
+from .browser import BrowserSession
 from .config import settings
 from .logutil import RunLogger, utc_iso
-from .db import connect, init, insert_run, finish_run, insert_products, insert_page_logs, insert_events
-from .scraper import scrape
-from .exporter import export_xlsx_csv
+from .db import connect, init, insert_run, finish_run
+from .writer import DbWriter
+from .linker import ProductLinker
+from .metrics import RunMetrics, write_prometheus_textfile
+from .sinks.fanout import FanOut
+from .sinks.sqlite_sink import SqliteSink
 
 def _ensure_dirs():
-    for d in (settings.data_dir, settings.logs_dir, settings.exports_dir):
+    for d in (settings.data_dir, settings.logs_dir, settings.exports_dir, settings.dataset_dir):
         os.makedirs(d, exist_ok=True)
         # check write permission
         test = os.path.join(d, ".write_test")
@@ -16,33 +21,92 @@ def _ensure_dirs():
         os.remove(test)
 
 def main():
+    # heavy deps (playwright, openpyxl, pyarrow) are only imported when a run starts
+    from pathlib import Path
+    from .scraper import scrape
+    from .exporter import export_history, export_paths, log_sheets, publish_exports
+    from .dataset import export_dataset
+    from .sinks.csv_sink import CsvSink
+    from .sinks.xlsx_sink import XlsxSink
+
     _ensure_dirs()
 
     run_id = str(uuid.uuid4())
     started = utc_iso()
 
-    log_path = os.path.join(settings.logs_dir, f"run_{run_id[:8]}_{started.replace(':','').replace('-','')[:15]}.jsonl")
-    logger = RunLogger(log_path)
-    logger.info("run_start", f"run_id={run_id} url={settings.category_url} pages={settings.max_pages}")
-
     conn = connect(settings.db_path)
     init(conn)
     insert_run(conn, run_id, started, settings.category_url, settings.max_pages, settings.headless)
 
+    # all further writes (rows, events, run status) go through the single writer;
+    # events are streamed to it in batches instead of being kept in memory
+    writer = DbWriter(settings.db_path).start()
+    log_path = os.path.join(settings.logs_dir, f"run_{run_id[:8]}_{started.replace(':','').replace('-','')[:15]}.jsonl")
+    logger = RunLogger(log_path, event_sink=lambda batch: writer.put_events(run_id, batch))
+    logger.info("run_start", f"run_id={run_id} url={settings.category_url} pages={settings.max_pages}")
+
+    metrics = RunMetrics(run_id)
+    run_t0 = time.perf_counter()
     status = "ERROR"
     note = ""
+    n_prod = 0
+    page_logs = []
+    # one browser per run; its storage_state (cookies, clearance) is kept for the next run
+    session = BrowserSession(metrics=metrics)
 
     try:
-        products, page_logs = scrape(run_id, logger)
-        n_prod = insert_products(conn, products)
-        n_pl = insert_page_logs(conn, page_logs)
-        n_ev = insert_events(conn, run_id, logger.events)
+        with metrics.span("linker_index") as sp:
+            linker = ProductLinker.from_db(conn)
+            sp["items"] = len(linker)
+
+        def tail_sheets():
+            # page_logs/logs sheets, after the last product batch; events reach the DB via the writer
+            logger.flush()
+            writer.flush()
+            return log_sheets(conn, run_id, page_logs=page_logs)
 
-        logger.info("db_written", f"products={n_prod} page_logs={n_pl} events={n_ev}")
+        # product rows stream page by page through the sink fan-out into the DB
+        # writer, the CSV and the XLSX at once; the exports are not re-read from the DB
+        # (export ALWAYS, even with 0 products — to see logs + page_logs)
+        xlsx_path, csv_path = export_paths(settings.exports_dir, run_id)
+        sinks = [
+            SqliteSink(writer.client()),
+            CsvSink(Path(csv_path)),
+            XlsxSink(Path(xlsx_path), sheet="products", tail_sheets=tail_sheets),
+        ]
+        with metrics.span("scrape"), FanOut(sinks) as fanout:
+            _, page_logs = scrape(run_id, logger, on_page=fanout.write, linker=linker, metrics=metrics, session=session)
+            with metrics.span("sinks_close"):
+                sink_stats = fanout.close()
+        session.close()
+        if session.save_error:
+            logger.warn("browser_state_not_saved", session.save_error)
+        n_prod = sink_stats[SqliteSink.name]["rows"]
+        for name, st in sink_stats.items():
+            metrics.record(f"sink_{name}", st["busy_s"] * 1000.0, items=st["rows"])
+        logger.info("sinks_done", " ".join(f"{k}={v['rows']}rows/{v['busy_s']:.3f}s" for k, v in sink_stats.items()))
+        writer.call("refresh_latest_prices", run_id)
+        writer.call("refresh_unit_prices", run_id)
+        n_pl = writer.put_page_logs(page_logs)
+        logger.info("db_written", f"products={n_prod} page_logs={n_pl}")
+        with metrics.span("db_flush_wait"):
+            logger.flush()
+            writer.flush()
+        wstats = writer.stats()
+        metrics.record("db_commit", wstats["commit_ms_total"], items=wstats["rows"])
+        for fn, ms in wstats["calls_ms"].items():
+            metrics.record(f"db_{fn}", ms)
 
-        # export ALWAYS (even if 0 products — to see logs + page_logs)
-        latest_xlsx, latest_csv = export_xlsx_csv(conn, settings.exports_dir, run_id, [e.__dict__ for e in logger.events])
+        with metrics.span("export_publish"):
+            latest_xlsx, latest_csv = publish_exports(settings.exports_dir, xlsx_path, csv_path)
         logger.info("export_done", f"xlsx={latest_xlsx} csv={latest_csv}")
+        with metrics.span("export_history") as sp:
+            history_path, n_hist = export_history(conn, settings.exports_dir, run_id=run_id, writer=writer)
+            sp["items"] = n_hist
+        logger.info("history_done", f"path={history_path} appended={n_hist}")
+        with metrics.span("export_dataset"):
+            part = export_dataset(conn, settings.dataset_dir, run_id)
+        logger.info("dataset_done", f"partition={part}")
 
         if n_prod == 0:
             status = "ZERO"
@@ -59,7 +123,28 @@ def main():
         raise  # make workflow red (so you never have “green but empty”)
 
     finally:
+        session.close()  # no-op if already closed after scraping
         finished = utc_iso()
-        finish_run(conn, run_id, finished, status, note)
+        run_s = time.perf_counter() - run_t0
+        metrics.record("run", run_s * 1000.0, items=n_prod)
+        summary = metrics.summary()
+        if "page" in summary:
+            pg = summary["page"]
+            logger.info("run_metrics", f"pages={pg['count']} page_p50_ms={pg['p50_ms']} page_p95_ms={pg['p95_ms']} run_s={run_s:.1f}")
+        writer.put_run_metrics(metrics.db_values())
+        if settings.metrics_textfile:
+            try:
+                write_prometheus_textfile(settings.metrics_textfile, summary, {
+                    "success": 1 if status == "OK" else 0,
+                    "products": n_prod,
+                    "pages": len(page_logs),
+                    "duration_seconds": round(run_s, 3),
+                    "finished_timestamp_seconds": round(time.time(), 3),
+                })
+            except OSError as e:
+                logger.warn("metrics_textfile_failed", str(e)[:300])
         logger.info("run_finish", f"status={status} note={note}")
+        logger.close()
+        writer.call("finish_run", run_id, finished, status, note)
+        writer.close()
         conn.close()
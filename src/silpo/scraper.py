@@ -1,11 +1,19 @@
 import json
 import re
-from typing import List, Optional, Tuple
-from playwright.sync_api import sync_playwright, Response
+import time
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Tuple
 
+from .browser import BrowserSession
 from .config import settings
+from .dedup import RunDeduper
+from .jsonstream import iter_array_elements, iter_chunks
+from .linker import ProductLinker
 from .logutil import RunLogger, utc_iso
-from .model import ProductRow, PageLogRow
+from .metrics import RunMetrics
+from .model import ProductBatch, ProductRow, PageLogRow
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Response
 
 PRICE_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*грн", re.IGNORECASE)
 
@@ -46,6 +54,29 @@ def _extract_products_from_any_json(obj) -> List[dict]:
             stack.extend(cur)
     return out
 
+def _iter_captured_products(captured: list) -> Iterator[dict]:
+    """
+    Products from captured responses. Raw bodies are stream-parsed (jsonstream):
+    only elements of items/products arrays are decoded, one at a time, which
+    saves the object graph of the whole document, not the body itself (the
+    response handler has already read it with resp.body()). A body that yields
+    no product that way is walked whole.
+    """
+    for obj in captured:
+        if not isinstance(obj, (bytes, bytearray)):
+            yield from _extract_products_from_any_json(obj)
+            continue
+        yielded = False
+        try:
+            for el in iter_array_elements(iter_chunks(obj)):
+                for product in _extract_products_from_any_json(el):
+                    yielded = True
+                    yield product
+            if not yielded:
+                yield from _extract_products_from_any_json(json.loads(obj))
+        except ValueError:
+            continue  # not JSON after all / truncated: keep what was parsed
+
 def _norm_product(raw: dict) -> tuple:
     title = (raw.get("title") or raw.get("name") or "").strip() or None
     brand = raw.get("brand")
@@ -90,31 +121,49 @@ def _norm_product(raw: dict) -> tuple:
 
     return title, brand, product_id, product_url, pack_qty, pack_unit, price_current, price_old, discount_pct
 
-def scrape(run_id: str, logger: RunLogger) -> tuple[List[ProductRow], List[PageLogRow]]:
+def scrape(
+    run_id: str,
+    logger: RunLogger,
+    on_page: Optional[Callable[[ProductBatch], None]] = None,
+    linker: Optional[ProductLinker] = None,
+    metrics: Optional[RunMetrics] = None,
+    session: Optional[BrowserSession] = None,
+) -> tuple[List[ProductRow], List[PageLogRow]]:
+    """
+    Scrape all pages. With `on_page`, each page's ProductBatch is handed to it as
+    soon as the page is parsed and is not accumulated (the returned list is empty).
+    With `linker`, DOM rows get the product_id of the best-matching known product.
+    Phase timings (per page: page, navigate, networkidle, json_capture,
+    normalize/dom_parse, link, dedup, sink) go to `metrics`.
+    Pages open in `session`'s shared context; without one, a session is
+    started (and closed) just for this call.
+    """
     all_products: List[ProductRow] = []
     all_page_logs: List[PageLogRow] = []
     batch_ts = utc_iso()
+    deduper = RunDeduper()
+    metrics = metrics or RunMetrics(run_id)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=settings.headless)
-        ctx = browser.new_context(
-            user_agent=settings.user_agent,
-            locale="uk-UA",
-            timezone_id="Europe/Kyiv",
-            viewport={"width": 1366, "height": 900},
-        )
-        page = ctx.new_page()
-        page.set_default_timeout(settings.timeout_ms)
+    own_session = session is None
+    if own_session:
+        session = BrowserSession(metrics=metrics)
+    try:
+        page = session.new_page()
 
         for page_number in range(1, settings.max_pages + 1):
             url = _page_url(settings.category_url, page_number)
             logger.info("page_start", f"page={page_number} url={url}")
+            page_t0 = time.perf_counter()
+            page_started = utc_iso()
 
             captured_json = []
+            capture_ms = 0.0
+            page_rows = ProductBatch(run_id, batch_ts, page_number, url)
             http_status: Optional[int] = None
 
-            def on_response(resp: Response):
-                nonlocal http_status
+            def on_response(resp: "Response"):
+                nonlocal http_status, capture_ms
+                t0 = time.perf_counter()
                 try:
                     if resp.url:
                         # store first status we see for this navigation
@@ -123,11 +172,11 @@ def scrape(run_id: str, logger: RunLogger) -> tuple[List[ProductRow], List[PageL
                         ctype = (resp.headers.get("content-type") or "").lower()
                         # try to catch JSON responses (site internal API responses)
                         if "application/json" in ctype:
-                            # small guard to avoid huge blobs
-                            data = resp.json()
-                            captured_json.append(data)
+                            # raw body: parsed incrementally after the page settles
+                            captured_json.append(resp.body() if settings.stream_json else resp.json())
                 except Exception:
                     pass
+                capture_ms += (time.perf_counter() - t0) * 1000.0
 
             page.on("response", on_response)
 
@@ -138,28 +187,43 @@ def scrape(run_id: str, logger: RunLogger) -> tuple[List[ProductRow], List[PageL
             note = None
 
             try:
-                page.goto(url, wait_until="domcontentloaded")
-                page.wait_for_load_state("networkidle")
-
-                # Parse captured JSON
-                raws = []
-                for obj in captured_json:
-                    raws.extend(_extract_products_from_any_json(obj))
+                with metrics.span("navigate", page_number):
+                    page.goto(url, wait_until="domcontentloaded")
+                with metrics.span("networkidle", page_number):
+                    page.wait_for_load_state("networkidle")
+                metrics.record("json_capture", capture_ms, page_number, len(captured_json))
+
+                # Normalize products from captured JSON
+                t_parse = time.perf_counter()
+                for raw in _iter_captured_products(captured_json):
+                    items_seen += 1
+                    title, brand, pid, purl, pack_qty, pack_unit, pc, po, disc = _norm_product(raw)
+                    page_rows.append(
+                        source="api",
+                        product_id=pid, product_url=purl,
+                        title=title, brand=brand,
+                        pack_qty=pack_qty, pack_unit=pack_unit,
+                        price_current=pc, price_old=po, discount_pct=disc,
+                        raw_json=json.dumps(raw, ensure_ascii=False)
+                    )
+                    items_saved += 1
 
                 # If nothing captured -> DOM fallback
-                if not raws:
+                if items_seen == 0:
                     method = "dom_fallback"
                     html = page.content().lower()
                     if "just a moment" in html:
                         status = "ERROR"
                         note = "challenge_page_detected (anti-bot)."
                         logger.warn("challenge", f"page={page_number} url={url}")
+                        session.discard_state()  # the saved clearance did not work
                         # still write page log and stop further pages (usually same result)
                         all_page_logs.append(PageLogRow(
                             run_id=run_id, upload_ts=batch_ts, page_number=page_number, page_url=url,
                             method=method, status=status, http_status=http_status,
                             items_seen=0, items_saved=0, note=note
                         ))
+                        metrics.record("page", (time.perf_counter() - page_t0) * 1000.0, page_number, 0, page_started)
                         break
 
                     # very simple DOM parse: find blocks with prices
@@ -180,38 +244,18 @@ def scrape(run_id: str, logger: RunLogger) -> tuple[List[ProductRow], List[PageL
                         title = txt.split("\n")[0][:200]
                         pack_qty, pack_unit = _parse_pack(title)
 
-                        all_products.append(ProductRow(
-                            run_id=run_id, upload_ts=batch_ts,
-                            page_number=page_number, page_url=url,
+                        page_rows.append(
                             source="dom",
                             product_id=None, product_url=None,
                             title=title, brand=None,
                             pack_qty=pack_qty, pack_unit=pack_unit,
                             price_current=price, price_old=None, discount_pct=None,
-                            raw_json=None
-                        ))
+                            raw_json=json.dumps({"text": txt}, ensure_ascii=False)  # card text: dedup and link key (dedup.py, linker.py)
+                        )
                         items_saved += 1
 
-                else:
-                    # Normalize products from JSON
-                    for raw in raws:
-                        items_seen += 1
-                        title, brand, pid, purl, pack_qty, pack_unit, pc, po, disc = _norm_product(raw)
-                        all_products.append(ProductRow(
-                            run_id=run_id, upload_ts=batch_ts,
-                            page_number=page_number, page_url=url,
-                            source="api",
-                            product_id=pid, product_url=purl,
-                            title=title, brand=brand,
-                            pack_qty=pack_qty, pack_unit=pack_unit,
-                            price_current=pc, price_old=po, discount_pct=disc,
-                            raw_json=json.dumps(raw, ensure_ascii=False)
-                        ))
-                        items_saved += 1
-
-                if items_saved == 0:
-                    status = "ZERO"
-                    note = "no_items_parsed_on_page"
+                phase = "dom_parse" if method == "dom_fallback" else "normalize"
+                metrics.record(phase, (time.perf_counter() - t_parse) * 1000.0, page_number, items_seen)
 
                 logger.info("page_done", f"page={page_number} items_seen={items_seen} items_saved={items_saved} method={method}")
 
@@ -220,12 +264,45 @@ def scrape(run_id: str, logger: RunLogger) -> tuple[List[ProductRow], List[PageL
                 note = f"exception: {str(e)[:200]}"
                 logger.error("page_error", f"page={page_number} url={url} err={note}")
 
+            # the page is reused: don't let this page's handler see the next page's traffic
+            page.remove_listener("response", on_response)
+
+            if linker is not None:
+                with metrics.span("link", page_number) as sp:
+                    linker.add_batch(page_rows)
+                    linked = sp["items"] = linker.link(page_rows)
+                if linked:
+                    logger.info("page_linked", f"page={page_number} linked={linked} known={len(linker)}")
+
+            # drop SKUs already captured on this page or an earlier one
+            with metrics.span("dedup", page_number) as sp:
+                page_rows, items_dup = deduper.filter(page_rows)
+                sp["items"] = items_dup
+            items_saved -= items_dup
+            if items_dup:
+                logger.info("page_dedup", f"page={page_number} duplicates={items_dup} unique_so_far={len(deduper)}")
+            # decided after dedup: a page of nothing but repeats saved nothing
+            if status == "OK" and items_saved == 0:
+                status = "ZERO"
+                note = "all_items_duplicates" if items_dup else "no_items_parsed_on_page"
+
+            # time spent here is sink backpressure (FanOut blocks when a sink is behind)
+            with metrics.span("sink", page_number, len(page_rows)):
+                if on_page is not None:
+                    on_page(page_rows)
+                else:
+                    all_products.extend(page_rows)
+            metrics.record("page", (time.perf_counter() - page_t0) * 1000.0, page_number, len(page_rows), page_started)
+
             all_page_logs.append(PageLogRow(
                 run_id=run_id, upload_ts=batch_ts, page_number=page_number, page_url=url,
                 method=method, status=status, http_status=http_status,
-                items_seen=items_seen, items_saved=items_saved, note=note
+                items_seen=items_seen, items_saved=items_saved, note=note, items_dup=items_dup
             ))
 
-        browser.close()
+        page.close()
+    finally:
+        if own_session:
+            session.close()
 
     return all_products, all_page_logs
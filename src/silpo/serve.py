@@ -0,0 +1,254 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from . import query
+from .dataset import category_slug
+
+# Read-only HTTP/JSON service over the SQLite store (`silpo serve`):
+#   GET /latest?offset=&limit=            latest price of every product
+#   GET /latest/<product_id>              latest price of one product
+#   GET /products/<product_id>/history    ?since=&until=
+#   GET /categories                       latest OK run per category
+#   GET /categories/<slug>?offset=&limit= products of that run (category snapshot)
+#   GET /health                           cache version and counters
+# Responses are built once per DB version and served from memory: the version
+# is (number of OK runs, last OK finished_at), so the cache is dropped exactly
+# when a run switches to OK. The DB is opened with mode=ro, one connection per
+# thread, and is only read on a cache miss, never blocking the writer.
+# Every response carries an ETag; If-None-Match answers 304 without a body.
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+CHUNK_ROWS = 500
+
+class _Entry:
+    __slots__ = ("etag", "meta", "items", "by_id")
+
+    def __init__(self, meta: Dict[str, Any], items: List[bytes], by_id: Optional[Dict[str, bytes]] = None):
+        self.etag = ""
+        self.meta = meta
+        self.items = items
+        self.by_id = by_id
+
+def _dump(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+def _etag(*parts: Any) -> str:
+    return '"' + hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:20] + '"'
+
+class ReadCache:
+    """Per-version response cache over read-only connections (thread-safe)."""
+    def __init__(self, db_path: str, check_interval: float = 1.0, max_entries: int = 256):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self.max_entries = max_entries
+        self.version: Optional[Tuple[int, Optional[str]]] = None
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._checked = float("-inf")
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._local = threading.local()
+
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = query.connect_readonly(self.db_path)
+        return conn
+
+    def _check_version(self) -> None:
+        if time.monotonic() - self._checked < self.check_interval:
+            return
+        version = query.ok_runs_version(self.conn())
+        with self._lock:
+            self._checked = time.monotonic()
+            if version != self.version:
+                if self.version is not None:
+                    self.stats["invalidations"] += 1
+                self.version = version
+                self._entries.clear()
+
+    def get(self, key: tuple, build: Callable[[sqlite3.Connection], _Entry]) -> _Entry:
+        self._check_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry
+        # one builder at a time: readers arriving after an invalidation wait
+        # for the first build instead of all querying the DB
+        with self._build_lock:
+            with self._lock:
+                version = self.version
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self.stats["hits"] += 1
+                    return entry
+            entry = build(self.conn())
+            entry.etag = _etag(version, key)
+            with self._lock:
+                self.stats["misses"] += 1
+                if self.version == version:
+                    self._entries[key] = entry
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return entry
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            n, last = self.version or (0, None)
+            return {"ok_runs": n, "last_ok_at": last, "entries": len(self._entries), **self.stats}
+
+def _build_latest(conn: sqlite3.Connection) -> _Entry:
+    rows = query.latest_prices(conn, limit=-1)
+    items = [_dump(r) for r in rows]
+    return _Entry({}, items, {r["product_id"]: b for r, b in zip(rows, items)})
+
+def _build_history(product_id: str, since: Optional[str], until: Optional[str]) -> Callable[[sqlite3.Connection], _Entry]:
+    def build(conn: sqlite3.Connection) -> _Entry:
+        return _Entry({"product_id": product_id}, [_dump(r) for r in query.price_history(conn, product_id, since, until)])
+    return build
+
+def _build_categories(conn: sqlite3.Connection) -> _Entry:
+    rows = query.latest_ok_runs_by_category(conn)
+    return _Entry({}, [_dump({"slug": category_slug(r["category_url"]), **r}) for r in rows])
+
+def _build_category(slug: str) -> Callable[[sqlite3.Connection], _Entry]:
+    def build(conn: sqlite3.Connection) -> _Entry:
+        for r in query.latest_ok_runs_by_category(conn):
+            if category_slug(r["category_url"]) == slug:
+                cur = query.run_products(conn, r["run_id"])
+                cols = [d[0] for d in cur.description]
+                items = [_dump(dict(zip(cols, row))) for row in cur]
+                return _Entry({"slug": slug, "run_id": r["run_id"], "finished_at": r["finished_at"]}, items)
+        raise LookupError(f"unknown category: {slug}")
+    return build
+
+def _int_param(params: Dict[str, List[str]], name: str, default: int) -> int:
+    try:
+        return int(params[name][0]) if name in params else default
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "ReadServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _error(self, status: int, message: str) -> None:
+        body = _dump({"error": message})
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_modified(self, etag: str) -> bool:
+        if etag not in (self.headers.get("If-None-Match") or ""):
+            return False
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return True
+
+    def _send_json(self, obj: Any, etag: str) -> None:
+        if self._not_modified(etag):
+            return
+        body = _dump(obj)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def _send_page(self, entry: _Entry, path: str, params: Dict[str, List[str]]) -> None:
+        """One page of entry.items, streamed in chunks of CHUNK_ROWS rows."""
+        offset = max(0, _int_param(params, "offset", 0))
+        limit = min(MAX_LIMIT, max(1, _int_param(params, "limit", DEFAULT_LIMIT)))
+        etag = _etag(entry.etag, offset, limit)
+        if self._not_modified(etag):
+            return
+        total = len(entry.items)
+        nxt = f"{quote(path)}?offset={offset + limit}&limit={limit}" if offset + limit < total else None
+        head = _dump({**entry.meta, "total": total, "offset": offset, "limit": limit, "next": nxt})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self._chunk(head[:-1] + b', "items": [')
+        page = entry.items[offset:offset + limit]
+        for i in range(0, len(page), CHUNK_ROWS):
+            self._chunk((b"," if i else b"") + b",".join(page[i:i + CHUNK_ROWS]))
+        self._chunk(b"]}")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self) -> None:
+        u = urlparse(self.path)
+        parts = [unquote(p) for p in u.path.strip("/").split("/") if p]
+        params = parse_qs(u.query)
+        cache = self.server.cache
+        try:
+            if parts == ["health"]:
+                h = cache.health()
+                self._send_json(h, _etag(h))
+            elif parts == ["latest"]:
+                self._send_page(cache.get(("latest",), _build_latest), u.path, params)
+            elif len(parts) == 2 and parts[0] == "latest":
+                entry = cache.get(("latest",), _build_latest)
+                row = entry.by_id.get(parts[1])
+                if row is None:
+                    self._error(404, f"unknown product: {parts[1]}")
+                else:
+                    self._send_json(json.loads(row), _etag(entry.etag, parts[1]))
+            elif len(parts) == 3 and parts[0] == "products" and parts[2] == "history":
+                since = params.get("since", [None])[0]
+                until = params.get("until", [None])[0]
+                entry = cache.get(("history", parts[1], since, until), _build_history(parts[1], since, until))
+                self._send_page(entry, u.path, params)
+            elif parts == ["categories"]:
+                self._send_page(cache.get(("categories",), _build_categories), u.path, params)
+            elif len(parts) == 2 and parts[0] == "categories":
+                self._send_page(cache.get(("category", parts[1]), _build_category(parts[1])), u.path, params)
+            else:
+                self._error(404, "not found")
+        except LookupError as e:
+            self._error(404, str(e).strip("'\""))
+        except ValueError as e:
+            self._error(400, str(e))
+        except sqlite3.Error as e:
+            self._error(503, f"database unavailable: {e}")
+
+class ReadServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, db_path: str, host: str = "127.0.0.1", port: int = 8080, check_interval: float = 1.0):
+        super().__init__((host, port), _Handler)
+        self.cache = ReadCache(db_path, check_interval)
+
+def serve(db_path: str, host: str = "127.0.0.1", port: int = 8080, check_interval: float = 1.0) -> None:
+    srv = ReadServer(db_path, host, port, check_interval)
+    print(f"serving {db_path} on http://{host}:{srv.server_address[1]}", flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
@@ -2,12 +2,26 @@ from pathlib import Path
 from typing import List
 import csv
 
-from ..model import HEADER, ProductRow
+from ..model import HEADER, ProductRow, Rows, header_rows
+from .fanout import Sink
+
+class CsvSink(Sink):
+    """Appends each batch to an open CSV file."""
+    name = "csv"
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = path.open("w", encoding="utf-8", newline="")
+        self._w = csv.writer(self._f)
+        self._w.writerow(HEADER)
+
+    def write_batch(self, rows: Rows) -> None:
+        self._w.writerows(header_rows(rows))
+
+    def close(self) -> None:
+        self._f.close()
 
 def write_csv(path: Path, rows: List[ProductRow]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(HEADER)
-        for r in rows:
-            w.writerow(r.as_list())
+    sink = CsvSink(path)
+    sink.write_batch(rows)
+    sink.close()
@@ -0,0 +1,112 @@
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..model import Rows
+
+class Sink(ABC):
+    """Streaming output: receives product batches in order, then close()."""
+    name = "sink"
+
+    @abstractmethod
+    def write_batch(self, rows: Rows) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+class FanOut:
+    """
+    Fans each batch out to every sink, one worker thread per sink.
+
+    Batches are shared (not copied) between sinks, so treat them as read-only.
+    Each sink has a bounded buffer of `max_buffer` batches; when a slow sink's
+    buffer is full, write() blocks (backpressure) instead of growing memory.
+    A failing sink is closed and skipped; its error is raised from close().
+    """
+    def __init__(self, sinks: Sequence[Sink], max_buffer: int = 8):
+        self._sinks = list(sinks)
+        self._queues: List["queue.Queue[Optional[Rows]]"] = [
+            queue.Queue(maxsize=max_buffer) for _ in self._sinks
+        ]
+        self._stats: List[Dict[str, Any]] = [
+            {"batches": 0, "rows": 0, "busy_s": 0.0, "max_batch_ms": 0.0, "blocked_s": 0.0, "error": None}
+            for _ in self._sinks
+        ]
+        self._threads = [
+            threading.Thread(target=self._work, args=(i,), name=f"silpo-sink-{s.name}", daemon=True)
+            for i, s in enumerate(self._sinks)
+        ]
+        for t in self._threads:
+            t.start()
+        self._closed = False
+
+    def _work(self, i: int) -> None:
+        sink, q, st = self._sinks[i], self._queues[i], self._stats[i]
+        while True:
+            batch = q.get()
+            if batch is None:
+                return
+            if st["error"] is not None:
+                continue  # keep draining so producers never block on a dead sink
+            t0 = time.perf_counter()
+            try:
+                sink.write_batch(batch)
+            except Exception as e:
+                st["error"] = f"{type(e).__name__}: {str(e)[:300]}"
+                continue
+            dt = time.perf_counter() - t0
+            st["batches"] += 1
+            st["rows"] += len(batch)
+            st["busy_s"] += dt
+            st["max_batch_ms"] = max(st["max_batch_ms"], dt * 1000.0)
+
+    def write(self, rows: Rows) -> None:
+        if self._closed:
+            raise ValueError("write to closed FanOut")
+        if not rows:
+            return
+        for q, st in zip(self._queues, self._stats):
+            t0 = time.perf_counter()
+            q.put(rows)
+            st["blocked_s"] += time.perf_counter() - t0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-sink timings (busy_s = time in the sink, blocked_s = producer wait on its buffer)."""
+        return {
+            s.name: {**st, "busy_s": round(st["busy_s"], 6), "max_batch_ms": round(st["max_batch_ms"], 3),
+                     "blocked_s": round(st["blocked_s"], 6), "queued": q.qsize()}
+            for s, st, q in zip(self._sinks, self._stats, self._queues)
+        }
+
+    def close(self) -> Dict[str, Dict[str, Any]]:
+        if not self._closed:
+            self._closed = True
+            for q in self._queues:
+                q.put(None)
+            for t in self._threads:
+                t.join()
+            for sink, st in zip(self._sinks, self._stats):
+                try:
+                    sink.close()
+                except Exception as e:
+                    st["error"] = st["error"] or f"{type(e).__name__}: {str(e)[:300]}"
+        stats = self.stats()
+        errors = {name: st["error"] for name, st in stats.items() if st["error"]}
+        if errors:
+            raise RuntimeError(f"sink(s) failed: {errors}")
+        return stats
+
+    def __enter__(self) -> "FanOut":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            try:
+                self.close()
+            except RuntimeError:
+                pass  # don't mask the original exception
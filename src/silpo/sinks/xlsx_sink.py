@@ -1,12 +1,60 @@
 from pathlib import Path
-from typing import List
-import pandas as pd
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
 
-from ..model import HEADER, ProductRow
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from ..exporter import stream_sheet
+from ..model import HEADER, ProductRow, Rows, header_rows
+from .fanout import Sink
+
+# (title, header, rows) of a sheet appended after the product rows
+Sheet = Tuple[str, Sequence[str], Iterable[Sequence]]
+
+class XlsxSink(Sink):
+    """
+    Streams batches into a write-only workbook, saved on close().
+    Column widths are taken from the header and the first batch. `tail_sheets`
+    is called on close(), after the last batch, for extra sheets (run_full adds
+    page_logs and logs there).
+    """
+    name = "xlsx"
+
+    def __init__(self, path: Path, sheet: str = "silpo_raw", tail_sheets: Optional[Callable[[], Iterable[Sheet]]] = None):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._path = path
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(sheet)
+        self._started = False
+        self._tail_sheets = tail_sheets
+
+    def _start(self, rows: Rows) -> None:
+        max_len = [max(10, len(h)) for h in HEADER]
+        for r in header_rows(rows):
+            for i, v in enumerate(r):
+                if v is not None:
+                    max_len[i] = max(max_len[i], len(str(v)))
+        for i, n in enumerate(max_len, 1):
+            self._ws.column_dimensions[get_column_letter(i)].width = min(max(12, n + 2), 60)
+        self._ws.freeze_panes = "A2"
+        self._ws.append(HEADER)
+        self._started = True
+
+    def write_batch(self, rows: Rows) -> None:
+        if not self._started:
+            self._start(rows)
+        for r in header_rows(rows):
+            self._ws.append(r)
+
+    def close(self) -> None:
+        if not self._started:
+            self._start([])
+        if self._tail_sheets is not None:
+            for title, header, rows in self._tail_sheets():
+                stream_sheet(self._wb, title, header, rows)
+        self._wb.save(self._path)
 
 def write_xlsx(path: Path, rows: List[ProductRow]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    data = [r.as_list() for r in rows]
-    df = pd.DataFrame(data, columns=HEADER)
-    with pd.ExcelWriter(path, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name="silpo_raw", index=False)
+    sink = XlsxSink(path)
+    sink.write_batch(rows)
+    sink.close()
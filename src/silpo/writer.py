@@ -0,0 +1,265 @@
+import inspect
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from . import db
+from .model import LogEvent, PageLogRow, ProductBatch, Rows
+
+# Single-writer service: one thread (or process) owns the sqlite3 connection and
+# producers only ever put row batches on a bounded queue. Batches are grouped
+# into large transactions, so parallel scrapers never fight over the write lock.
+#
+# Queue messages are plain picklable tuples so the same protocol works for
+# threads (queue.Queue) and processes (multiprocessing.Queue):
+#   ("products" | "page_logs" | "events" | "run_metrics", [value tuples])
+#   ("batch", ProductBatch)                 columnar rows, expanded by the writer
+#   ("call", "<db function name>", args)   e.g. ("call", "finish_run", (...)),
+#                                           run with commit=False inside the group
+#   ("flush" | "close", token)
+# Replies are (token, stats). If the writer itself fails (cannot open the DB,
+# unexpected error) it replies (None, {"fatal": ...}) and then keeps answering
+# flush/close with the same error, so no caller waits on a dead writer.
+
+_SQL = {
+    "products": db.PRODUCTS_INSERT,
+    "batch": db.PRODUCTS_INSERT,
+    "page_logs": db.PAGE_LOGS_INSERT,
+    "events": db.EVENTS_INSERT,
+    "run_metrics": db.RUN_METRICS_INSERT,
+}
+
+class WriterClient:
+    """Producer handle; cheap to copy into worker threads/processes."""
+    def __init__(self, q):
+        self._q = q
+
+    def put_products(self, rows: Rows) -> int:
+        if isinstance(rows, ProductBatch):
+            if len(rows):
+                self._q.put(("batch", rows))
+            return len(rows)
+        values = [db.product_values(r) for r in rows]
+        if values:
+            self._q.put(("products", values))  # blocks when the writer is behind
+        return len(values)
+
+    def put_page_logs(self, rows: Iterable[PageLogRow]) -> int:
+        values = [db.page_log_values(r) for r in rows]
+        if values:
+            self._q.put(("page_logs", values))
+        return len(values)
+
+    def put_events(self, run_id: str, events: Iterable[LogEvent]) -> int:
+        values = [db.event_values(run_id, e) for e in events]
+        if values:
+            self._q.put(("events", values))
+        return len(values)
+
+    def put_run_metrics(self, values: List[tuple]) -> int:
+        """Rows from metrics.RunMetrics.db_values()."""
+        if values:
+            self._q.put(("run_metrics", list(values)))
+        return len(values)
+
+    def call(self, fn_name: str, *args: Any) -> None:
+        """Run db.<fn_name>(conn, *args, commit=False) on the writer, in queue order."""
+        fn = getattr(db, fn_name, None)
+        if not callable(fn):
+            raise ValueError(f"unknown db function: {fn_name}")
+        if "commit" not in inspect.signature(fn).parameters:
+            raise ValueError(f"db.{fn_name} has no commit argument and would commit mid-group")
+        self._q.put(("call", fn_name, args))
+
+def _writer_loop(db_path: str, q, replies, batch_rows: int, max_delay: float) -> None:
+    try:
+        _serve(db_path, q, replies, batch_rows, max_delay)
+    except Exception as e:
+        fatal = {"fatal": f"{type(e).__name__}: {str(e)[:300]}"}
+        replies.put((None, fatal))
+        # keep draining so producers never block on a full queue
+        while True:
+            msg = q.get()
+            if msg[0] in ("flush", "close"):
+                replies.put((msg[1], fatal))
+                if msg[0] == "close":
+                    return
+
+def _serve(db_path: str, q, replies, batch_rows: int, max_delay: float) -> None:
+    conn = db.connect(db_path)
+    try:
+        db.init(conn)
+    except Exception:
+        conn.close()
+        raise
+    stats: Dict[str, Any] = {
+        "commits": 0, "rows": 0, "commit_ms_last": 0.0, "commit_ms_max": 0.0,
+        "commit_ms_total": 0.0, "errors": 0, "last_error": None,
+        "calls_ms": {},  # db function name -> total ms (refresh_* etc.)
+    }
+    pending: List[tuple] = []
+    pending_rows = 0
+    deadline: Optional[float] = None
+
+    def commit():
+        nonlocal pending, pending_rows, deadline
+        if not pending:
+            return
+        t0 = time.perf_counter()
+        try:
+            with conn:
+                for msg in pending:
+                    if msg[0] == "call":
+                        t_call = time.perf_counter()
+                        getattr(db, msg[1])(conn, *msg[2], commit=False)
+                        calls = stats["calls_ms"]
+                        calls[msg[1]] = round(calls.get(msg[1], 0.0) + (time.perf_counter() - t_call) * 1000.0, 3)
+                    elif msg[0] == "batch":
+                        conn.executemany(_SQL["batch"], msg[1].db_values())
+                    else:
+                        conn.executemany(_SQL[msg[0]], msg[1])
+            stats["rows"] += pending_rows
+        except Exception as e:
+            stats["errors"] += 1
+            stats["last_error"] = f"{type(e).__name__}: {str(e)[:300]}"
+        ms = (time.perf_counter() - t0) * 1000.0
+        stats["commits"] += 1
+        stats["commit_ms_last"] = round(ms, 3)
+        stats["commit_ms_max"] = round(max(stats["commit_ms_max"], ms), 3)
+        stats["commit_ms_total"] = round(stats["commit_ms_total"] + ms, 3)
+        pending, pending_rows, deadline = [], 0, None
+
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                msg = q.get(timeout=timeout)
+            except queue.Empty:
+                commit()
+                continue
+
+            kind = msg[0]
+            if kind in ("flush", "close"):
+                commit()
+                replies.put((msg[1], {**stats, "calls_ms": dict(stats["calls_ms"])}))
+                if kind == "close":
+                    break
+                continue
+
+            pending.append(msg)
+            pending_rows += len(msg[1]) if kind in _SQL else 0
+            if deadline is None:
+                deadline = time.monotonic() + max_delay
+            if pending_rows >= batch_rows or kind == "call":
+                commit()
+    finally:
+        conn.close()
+
+POLL_S = 0.1
+
+class DbWriter(WriterClient):
+    """
+    Owns the write connection on a dedicated thread (default) or process.
+
+    Use .client() to hand a producer handle to other threads/processes;
+    .flush() waits until everything queued so far is committed and raises
+    if any batch failed since the last flush.
+    """
+    def __init__(
+        self,
+        db_path: str,
+        use_process: bool = False,
+        max_queue: int = 64,
+        batch_rows: int = 5000,
+        max_delay: float = 0.5,
+    ):
+        self.use_process = use_process
+        if use_process:
+            q, self._replies = mp.Queue(maxsize=max_queue), mp.Queue()
+            self._worker = mp.Process(
+                target=_writer_loop, args=(db_path, q, self._replies, batch_rows, max_delay),
+                name="silpo-db-writer", daemon=True,
+            )
+        else:
+            q, self._replies = queue.Queue(maxsize=max_queue), queue.Queue()
+            self._worker = threading.Thread(
+                target=_writer_loop, args=(db_path, q, self._replies, batch_rows, max_delay),
+                name="silpo-db-writer", daemon=True,
+            )
+        super().__init__(q)
+        self._tokens = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {}
+        self._errors_seen = 0
+        self._closed = False
+
+    def start(self) -> "DbWriter":
+        self._worker.start()
+        return self
+
+    def client(self) -> WriterClient:
+        return WriterClient(self._q)
+
+    def queue_depth(self) -> int:
+        try:
+            return self._q.qsize()
+        except NotImplementedError:  # multiprocessing.Queue on macOS
+            return -1
+
+    def stats(self) -> Dict[str, Any]:
+        """Last stats reported by the writer plus the current queue depth."""
+        return {**self._stats, "queue_depth": self.queue_depth()}
+
+    def _check_alive(self, deadline: Optional[float]) -> None:
+        if not self._worker.is_alive():
+            raise RuntimeError("DB writer is not running")
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("DB writer did not answer in time")
+
+    def _roundtrip(self, kind: str, timeout: Optional[float]) -> None:
+        # short polls, so a writer that died without replying raises instead of hanging
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            token = next(self._tokens)
+            while True:
+                try:
+                    self._q.put((kind, token), timeout=POLL_S)
+                    break
+                except queue.Full:
+                    self._check_alive(deadline)
+            while True:
+                try:
+                    got, stats = self._replies.get(timeout=POLL_S)
+                except queue.Empty:
+                    self._check_alive(deadline)
+                    continue
+                if "fatal" in stats:
+                    self._stats = stats
+                    raise RuntimeError(f"DB writer failed: {stats['fatal']}")
+                if got == token:
+                    break
+            self._stats = stats
+            if stats["errors"] > self._errors_seen:
+                self._errors_seen = stats["errors"]
+                raise RuntimeError(f"DB writer batch failed: {stats['last_error']}")
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        self._roundtrip("flush", timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._roundtrip("close", timeout)
+        finally:
+            self._worker.join(timeout)
+
+    def __enter__(self) -> "DbWriter":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from silpo.api_client import iter_products
+from silpo.jsonstream import iter_array_elements, iter_chunks
+from silpo.scraper import _iter_captured_products
+
+def _body(doc):
+    return json.dumps(doc, ensure_ascii=False).encode("utf-8")
+
+def _elements(body, size):
+    return list(iter_array_elements(iter_chunks(body, size)))
+
+# every chunk size up to 24, then the whole body at once: each token, escape
+# and multibyte character lands on a chunk boundary in some run
+SIZES = list(range(1, 25)) + [1 << 20]
+
+@pytest.mark.parametrize("size", SIZES)
+def test_escapes_split_across_chunks(size):
+    items = [
+        {"name": 'say "hi" [not an array]', "price": 1},
+        {"name": "back\\slash\\", "price": 2},
+        {"name": '\\"}{][,:', "price": 3},
+    ]
+    doc = {"note": 'a "quoted" \\ key', "items": items}
+    assert _elements(_body(doc), size) == items
+
+@pytest.mark.parametrize("size", SIZES)
+def test_multibyte_utf8_split_across_chunks(size):
+    items = [{"name": "Молоко «Галичина» 2,5% — 900 мл ✓", "price": 45.9}]
+    body = _body({"items": items})
+    assert _elements(body, size) == items
+
+def test_items_nested_in_a_non_product_object():
+    filters = [{"id": "f1"}, {"id": "f2"}]
+    products = [{"name": "Кефір", "price": 40}]
+    body = _body({"meta": {"filters": {"items": filters}}, "data": {"products": products}})
+    assert _elements(body, 7) == filters + products
+    # only the product-like elements come out of the API reader
+    assert list(iter_products(iter_chunks(body, 7))) == products
+
+def test_items_holding_a_scalar_or_an_object_is_not_an_array():
+    products = [{"name": "Хліб", "price": 30}]
+    body = _body({
+        "items": 3,
+        "x": {"items": {"list": [{"name": "not", "price": 0}]}},
+        "data": {"items": products},
+    })
+    assert _elements(body, 5) == products
+    body = _body({"items": {"a": [{"b": 1}]}, "products": "none", "rest": [[{"c": 2}]]})
+    assert _elements(body, 5) == []
+
+def test_scalar_elements_are_skipped():
+    body = _body({"items": [1, "two", None, {"name": "x", "price": 1}, [2]]})
+    assert _elements(body, 4) == [{"name": "x", "price": 1}, [2]]
+
+def test_truncated_input_raises_value_error():
+    body = _body({"total": 12, "items": [{"name": "a\\\"b", "price": 1.5}, {"name": "Сир", "price": 2}]})
+    for cut in range(1, len(body)):
+        with pytest.raises(ValueError):
+            _elements(body[:cut], 8)
+    with pytest.raises(ValueError):
+        _elements(b'{"items": [{"a": 1}]}}', 8)
+
+NO_PRODUCT_ARRAY = {"data": {"list": [{"title": "Йогурт", "price": 20}, {"title": "Масло", "price": 80}]}}
+
+def _names(products):
+    return sorted(p["title"] for p in products)
+
+def test_api_reader_falls_back_to_the_full_walk():
+    body = _body(NO_PRODUCT_ARRAY)
+    assert _names(iter_products(iter_chunks(body, 6))) == ["Йогурт", "Масло"]
+    # items present, but none of them is a product
+    body = _body({"items": [{"id": 1}], **NO_PRODUCT_ARRAY})
+    assert _names(iter_products(iter_chunks(body, 6))) == ["Йогурт", "Масло"]
+
+def test_captured_responses_fall_back_to_the_full_walk():
+    captured = [
+        _body(NO_PRODUCT_ARRAY),
+        _body({"items": [{"title": "Сир", "price": 99}]}),
+        b"<html>not json</html>",
+        {"products": [{"title": "Кава", "price": 150}]},  # already parsed
+    ]
+    assert _names(_iter_captured_products(captured)) == ["Йогурт", "Кава", "Масло", "Сир"]
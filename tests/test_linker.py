@@ -0,0 +1,22 @@
+import json
+
+from silpo.linker import ProductLinker
+from silpo.model import ProductBatch
+
+def _dom_row(batch, card):
+    title = card.split("\n")[0]
+    batch.append("dom", None, None, title, None, None, None, 45.9, None, None, json.dumps({"text": card}))
+
+def test_dom_rows_are_matched_on_the_card_text_not_the_price_line():
+    linker = ProductLinker()
+    linker.add("1", "Молоко «Галичина» 2.5% 900мл", product_url="/p/1")
+    linker.add("2", "Кефір «Яготинське» 1% 900г", product_url="/p/2")
+    linker.add("3", "Хліб «Київхліб» білий 500г", product_url="/p/3")
+
+    batch = ProductBatch("r", "2026-10-19T00:00:00+00:00", 1, "u")
+    _dom_row(batch, "45.90 грн\n52.00 грн\nМолоко «Галичина» 2.5% 900мл")
+    _dom_row(batch, "45.90 грн\nКефір «Яготинське» 1% 900г")
+    _dom_row(batch, "45.90 грн")
+    assert linker.link(batch) == 2
+    assert batch.product_id == ["1", "2", None]
+    assert batch.product_url == ["/p/1", "/p/2", None]
@@ -0,0 +1,144 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from silpo.logutil import BufferedJsonlWriter, RunLogger
+from silpo.model import LogEvent
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# A flush interval no test waits for: records only reach the file through
+# the threshold or call under test.
+NEVER = 3600.0
+
+def _lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return cond()
+
+def _run_child(tmp_path, body):
+    """Run `body` in a fresh interpreter with `log` = path of the JSONL file."""
+    log = str(tmp_path / "child.jsonl")
+    script = "from silpo.logutil import BufferedJsonlWriter, RunLogger\n"
+    script += f"log = {log!r}\n" + textwrap.dedent(body)
+    env = {**os.environ, "PYTHONPATH": SRC}
+    proc = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, timeout=60)
+    return proc, _lines(log)
+
+def test_error_event_is_written_before_error_returns(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    logger = RunLogger(path, max_batch=1000, flush_interval=NEVER)
+    logger.info("step", "buffered")
+    time.sleep(0.05)
+    assert _lines(path) == []
+
+    logger.error("boom", "cause")
+    # no waiting: the ERROR and everything queued before it are in the file
+    assert [r["event"] for r in _lines(path)] == ["step", "boom"]
+    logger.close()
+
+def test_batch_is_written_when_max_batch_is_reached(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    out = BufferedJsonlWriter(path, max_batch=3, flush_interval=NEVER)
+    out.write({"n": 1})
+    out.write({"n": 2})
+    time.sleep(0.05)
+    assert _lines(path) == []
+
+    out.write({"n": 3})
+    assert _wait_for(lambda: len(_lines(path)) == 3)
+    out.close()
+
+def test_batch_is_written_after_flush_interval(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    out = BufferedJsonlWriter(path, max_batch=1000, flush_interval=0.1)
+    t0 = time.monotonic()
+    out.write({"n": 1})
+    assert _wait_for(lambda: len(_lines(path)) == 1)
+    assert time.monotonic() - t0 >= 0.1
+    out.close()
+
+def test_flush_and_close_write_everything(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    batches = []
+    out = BufferedJsonlWriter(path, max_batch=1000, flush_interval=NEVER, on_batch=batches.append)
+    out.write({"n": 1})
+    out.flush()
+    assert _lines(path) == [{"n": 1}]
+
+    out.write({"n": 2})
+    out.close()
+    assert _lines(path) == [{"n": 1}, {"n": 2}]
+    assert batches == [[{"n": 1}], [{"n": 2}]]
+    out.close()  # idempotent
+    with pytest.raises(ValueError):
+        out.write({"n": 3})
+
+def test_event_sink_receives_batches_instead_of_memory(tmp_path):
+    got = []
+    logger = RunLogger(str(tmp_path / "run.jsonl"), event_sink=got.extend, flush_interval=NEVER)
+    logger.info("a", "1")
+    logger.warn("b", "2")
+    logger.close()
+    assert logger.events == []
+    assert [(e.level, e.event) for e in got] == [("INFO", "a"), ("WARN", "b")]
+    assert all(isinstance(e, LogEvent) for e in got)
+
+def test_interpreter_exit_drains_the_buffer(tmp_path):
+    proc, lines = _run_child(tmp_path, f"""
+        logger = RunLogger(log, max_batch=1000, flush_interval={NEVER})
+        for i in range(100):
+            logger.info("step", str(i))
+        # no close(): the atexit hook drains the buffer
+    """)
+    assert proc.returncode == 0, proc.stderr
+    assert len(lines) == 100
+
+def test_unhandled_exception_loses_nothing(tmp_path):
+    proc, lines = _run_child(tmp_path, f"""
+        logger = RunLogger(log, max_batch=1000, flush_interval={NEVER})
+        logger.info("step", "before")
+        raise RuntimeError("crash")
+    """)
+    assert proc.returncode == 1 and b"RuntimeError: crash" in proc.stderr
+    assert [r["event"] for r in lines] == ["step"]
+
+def test_hard_kill_loses_only_the_unflushed_tail(tmp_path):
+    proc, lines = _run_child(tmp_path, f"""
+        import os, signal
+        logger = RunLogger(log, max_batch=1000, flush_interval={NEVER})
+        logger.info("step", "flushed")
+        logger.flush()
+        logger.error("boom", "written synchronously")
+        logger.info("step", "lost")
+        os.kill(os.getpid(), signal.SIGKILL)
+    """)
+    assert proc.returncode == -signal.SIGKILL
+    assert [r["message"] for r in lines] == ["flushed", "written synchronously"]
+
+def test_unserializable_record_raises_at_the_call_site(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    out = BufferedJsonlWriter(path, max_batch=1000, flush_interval=NEVER)
+    out.write({"n": 1})
+    with pytest.raises(TypeError):
+        out.write({"n": 2, "path": tmp_path})
+    out.write({"n": 3})
+    out.close()
+    # the bad record is not queued and does not take its batch down with it
+    assert _lines(path) == [{"n": 1}, {"n": 3}]
+    assert out.errors == 0
@@ -0,0 +1,21 @@
+import os
+import sqlite3
+
+from silpo.maintenance import reclaim_space
+
+def test_reclaim_space_empties_the_freelist(tmp_path):
+    path = str(tmp_path / "m.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE t(x)")
+    conn.executemany("INSERT INTO t VALUES (?)", [("x" * 500,)] * 2000)
+    conn.commit()
+    conn.execute("DELETE FROM t")
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] > 1
+    size = os.path.getsize(path)
+    assert reclaim_space(conn) == "incremental"
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert os.path.getsize(path) < size
@@ -0,0 +1,25 @@
+from silpo import db, query
+
+def _db(tmp_path, stamps):
+    conn = db.connect(str(tmp_path / "q.sqlite"))
+    db.init(conn)
+    db.insert_run(conn, "r", stamps[0], "u", 1, True)
+    conn.executemany(
+        "INSERT INTO products(run_id, upload_ts, page_number, page_url, source, product_id, price_current) "
+        "VALUES ('r', ?, 1, 'u', 'api', '100000', 10)",
+        [(ts,) for ts in stamps],
+    )
+    conn.commit()
+    return conn
+
+def test_price_history_date_bounds_include_the_whole_day(tmp_path):
+    conn = _db(tmp_path, [
+        "2026-10-18T09:00:00+00:00", "2026-10-19T09:00:00+00:00",
+        "2026-10-19T20:00:00+00:00", "2026-10-20T01:00:00+00:00",
+    ])
+    def days(**kw):
+        return [r["upload_ts"][:10] for r in query.price_history(conn, "100000", **kw)]
+    assert days(until="2026-10-19") == ["2026-10-18", "2026-10-19", "2026-10-19"]
+    assert days(since="2026-10-19", until="2026-10-19") == ["2026-10-19", "2026-10-19"]
+    assert days(until="2026-10-19T10:00:00") == ["2026-10-18", "2026-10-19"]
+    assert len(days()) == 4
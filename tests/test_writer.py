@@ -0,0 +1,71 @@
+import sqlite3
+import threading
+
+import pytest
+
+from silpo.model import LogEvent
+from silpo.writer import DbWriter
+
+# A max_delay no test waits for: a group is committed by flush()/close() or a call.
+NEVER = 3600.0
+
+MODES = pytest.mark.parametrize("use_process", [False, True], ids=["thread", "process"])
+
+def _event(n):
+    return LogEvent(ts=f"2026-10-19T00:00:{n:02d}+00:00", level="INFO", event="step", message=str(n))
+
+def _count(path, table):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+@MODES
+def test_rows_and_calls_are_committed_in_order(tmp_path, use_process):
+    path = str(tmp_path / "w.sqlite")
+    with DbWriter(path, use_process=use_process, max_delay=NEVER) as w:
+        w.call("insert_run", "r", "2026-10-19T00:00:00+00:00", "u", 1, True)
+        assert w.put_events("r", [_event(1), _event(2)]) == 2
+        w.call("finish_run", "r", "2026-10-19T00:01:00+00:00", "OK", "")
+        w.flush(timeout=10)
+        assert w.stats()["rows"] == 2 and w.stats()["errors"] == 0
+    assert _count(path, "events") == 2
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT status FROM runs").fetchone() == ("OK",)
+    conn.close()
+
+@MODES
+def test_failure_rolls_back_the_whole_group_and_flush_raises(tmp_path, use_process):
+    path = str(tmp_path / "w.sqlite")
+    with DbWriter(path, use_process=use_process, max_delay=NEVER) as w:
+        w.call("insert_run", "r", "2026-10-19T00:00:00+00:00", "u", 1, True)
+        w.flush(timeout=10)
+
+        w.put_events("r", [_event(1), _event(2)])
+        w.put_events("missing-run", [_event(3)])  # foreign key violation
+        with pytest.raises(RuntimeError, match="batch failed"):
+            w.flush(timeout=10)
+        assert _count(path, "events") == 0  # the valid rows of the group went too
+
+        w.flush(timeout=10)  # the error is reported once
+        w.put_events("r", [_event(4)])
+        w.flush(timeout=10)
+    assert _count(path, "events") == 1
+
+@MODES
+def test_fatal_startup_error_never_hangs_producers(tmp_path, use_process):
+    w = DbWriter(str(tmp_path / "no-such-dir" / "w.sqlite"), use_process=use_process, max_queue=2).start()
+
+    # the dead writer keeps draining, so puts past max_queue do not block
+    producer = threading.Thread(target=lambda: [w.put_events("r", [_event(n)]) for n in range(20)], daemon=True)
+    producer.start()
+    producer.join(10)
+    assert not producer.is_alive()
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="DB writer failed"):
+            w.flush(timeout=10)
+    with pytest.raises(RuntimeError, match="DB writer failed"):
+        w.close(timeout=10)
+    assert "fatal" in w.stats()